@@ -26,6 +26,7 @@ the nonconformity scores on the calibration set and to compute the prediction
 sets.
 """
 import logging
+from copy import deepcopy
 from typing import Callable
 from typing import Iterable
 from typing import Optional
@@ -38,6 +39,10 @@ from deel.puncc.api.utils import quantile
 
 logger = logging.getLogger(__name__)
 
+# Memory budget (in bytes) of the aggregated K-fold bounds computed at once
+# by the cv+ calibration
+_CV_PLUS_BLOCK_NBYTES = 2**23
+
 
 class BaseCalibrator:
     """:class:`BaseCalibrator` offers a framework to compute user-defined
@@ -133,6 +138,22 @@ class BaseCalibrator:
         self._len_calib = 0
         self._residuals = None
         self._norm_weights = None
+        # Nonconformity scores completed by +inf and sorted, built lazily
+        self._sorted_lemma_residuals = None
+        # Quantiles of the nonconformity scores w.r.t the calibration weights,
+        # indexed by alpha
+        self._quantile_cache = {}
+
+    def __setstate__(self, state: dict):
+        """Restore the calibrator from its pickled state. Calibrators pickled
+        before the sorted scores and the quantiles were cached lack these
+        caches, they are then rebuilt lazily.
+
+        :param dict state: pickled state.
+        """
+        self._sorted_lemma_residuals = None
+        self._quantile_cache = {}
+        self.__dict__.update(state)
 
     def fit(
         self,
@@ -152,6 +173,8 @@ class BaseCalibrator:
         logger.debug(f"Shape of y_true: {y_true.shape}")
         self._residuals = self.nonconf_score_func(y_pred, y_true)
         self._len_calib = len(self._residuals)
+        self._sorted_lemma_residuals = None
+        self._quantile_cache = {}
         logger.debug("Nonconformity scores computed !")
 
     def calibrate(
@@ -192,16 +215,81 @@ class BaseCalibrator:
         ## The coverage guarantee holds with 1) the inflated
         ## (1-\alpha)(1+1/n)-th quantile or 2) when adding an infinite term to
         ## the sequence and computing the $(1-\alpha)$-th empirical quantile.
-        infty_array = np.array([np.inf])
-        lemma_residuals = np.concatenate((self._residuals, infty_array))
-        residuals_Q = quantile(
-            lemma_residuals,
-            1 - alpha,
-            w=weights,
-        )
+        # The calibration weights do not change between two calls to `fit`,
+        # so the quantile they yield is computed once per alpha. Unweighted
+        # quantiles are read from the sorted scores and are not cached.
+        cacheable = weights is not None and weights is self._norm_weights
+        if cacheable and alpha in self._quantile_cache:
+            residuals_Q = self._quantile_cache[alpha]
+        elif (
+            weights is None
+            and isinstance(self._residuals, np.ndarray)
+            and self._residuals.ndim == 1
+        ):
+            # Unweighted case: the nonconformity scores do not change between
+            # two calls, so they are sorted once and the empirical quantile
+            # is read directly. The order statistic rank is the one of
+            # np.quantile(method="inverted_cdf").
+            sorted_residuals = self._get_sorted_lemma_residuals()
+            n = len(sorted_residuals)
+            k = int(np.clip(np.ceil(n * (1 - alpha) - 1), 0, n - 1))
+            residuals_Q = sorted_residuals[k]
+        else:
+            infty_array = np.array([np.inf])
+            lemma_residuals = np.concatenate((self._residuals, infty_array))
+            residuals_Q = quantile(
+                lemma_residuals,
+                1 - alpha,
+                w=weights,
+            )
+            if cacheable:
+                self._quantile_cache[alpha] = residuals_Q
 
         return self.pred_set_func(y_pred, scores_quantile=residuals_Q)
 
+    def clone(self):
+        """Returns an unfitted copy of the calibrator: the nonconformity score,
+        prediction set and weight functions are shared but no nonconformity
+        score nor weight is carried over.
+
+        Subclasses that override `__init__` are deep-copied instead, and the
+        copy is then reset to an unfitted state.
+
+        :returns: unfitted calibrator.
+        :rtype: BaseCalibrator
+        """
+        if type(self).__init__ is BaseCalibrator.__init__:
+            return type(self)(
+                nonconf_score_func=self.nonconf_score_func,
+                pred_set_func=self.pred_set_func,
+                weight_func=self.weight_func,
+            )
+
+        clone = deepcopy(self)
+        clone._len_calib = 0
+        clone._residuals = None
+        clone._norm_weights = None
+        clone._sorted_lemma_residuals = None
+        clone._quantile_cache = {}
+        return clone
+
+    def _get_sorted_lemma_residuals(self) -> np.ndarray:
+        """Getter of the nonconformity scores completed by an infinite term
+        and sorted in ascending order. They are computed once after each call
+        to :meth:`fit`.
+
+        :returns: sorted nonconformity scores.
+        :rtype: ndarray
+        """
+        if self._sorted_lemma_residuals is None:
+            lemma_residuals = np.concatenate((self._residuals, [np.inf]))
+            lemma_residuals.sort()
+            # np.quantile returns nan as soon as one of the scores is nan
+            if np.isnan(lemma_residuals[-1]):
+                lemma_residuals[:] = np.nan
+            self._sorted_lemma_residuals = lemma_residuals
+        return self._sorted_lemma_residuals
+
     def set_norm_weights(self, norm_weights: np.ndarray) -> None:
         """Setter of normalized weights associated to the nonconformity
         scores on the calibration set.
@@ -210,6 +298,7 @@ class BaseCalibrator:
 
         """
         self._norm_weights = norm_weights
+        self._quantile_cache = {}
 
     def get_norm_weights(self) -> np.ndarray:
         """Getter of normalized weights associated to the nonconformity
@@ -264,6 +353,8 @@ class CvPlusCalibrator:
     def __init__(self, kfold_calibrators: dict):
         self.kfold_calibrators_dict = kfold_calibrators
         self._len_calib = None
+        self._nconf_scores_matrix = None
+        self._fold_offsets = None
 
         # Sanity checks:
         #   - The collection of calibrators is not None
@@ -276,13 +367,14 @@ class CvPlusCalibrator:
                 raise RuntimeError(f"Fold {k} calibrator is not defined.")
 
     def fit(self) -> None:
-        """Check if all calibrators have already been fitted.
+        """Check if all calibrators have already been fitted and gather their
+        nonconformity scores in a single contiguous buffer.
 
         :raises RuntimeError: one or more of the calibrators did not estimate
             the nonconformity scores.
 
         """
-        len_calib = 0
+        kfold_nconf_scores = []
         for k, calibrator in self.kfold_calibrators_dict.items():
             kth_nconf_scores = calibrator.get_nonconformity_scores()
             if kth_nconf_scores is None:
@@ -291,80 +383,200 @@ class CvPlusCalibrator:
                     + "been estimated its nonconformity scores."
                 )
                 raise RuntimeError(error_msg)
-            len_calib += len(kth_nconf_scores)
-        self._len_calib = len_calib
+            try:
+                kth_nconf_scores = np.asarray(kth_nconf_scores)
+            except Exception:
+                # @TODO extend the scope beyond castable to ndarrays
+                raise RuntimeError(
+                    "Cannot cast nonconformity scores to numpy array."
+                )
+            kfold_nconf_scores.append(kth_nconf_scores)
+
+        self._nconf_scores_matrix = np.concatenate(kfold_nconf_scores, axis=-1)
+        self._fold_offsets = np.cumsum(
+            [0] + [scores.shape[-1] for scores in kfold_nconf_scores]
+        )
+        self._len_calib = int(self._fold_offsets[-1])
+
+    def get_nonconformity_scores_matrix(self) -> Tuple[np.ndarray]:
+        """Getter for the nonconformity scores of all folds, concatenated
+        in a single array. The scores of the :math:`k`-th calibrator
+        (in insertion order) are found between `fold_offsets[k]` and
+        `fold_offsets[k+1]`.
+
+        The concatenation is computed once and cached until :meth:`fit` is
+        called again.
+
+        :returns: concatenated nonconformity scores and fold offsets.
+        :rtype: Tuple[ndarray]
+        """
+        if self._nconf_scores_matrix is None:
+            self.fit()
+        return self._nconf_scores_matrix, self._fold_offsets
 
     def calibrate(
         self,
         *,
-        X: Iterable,
-        kfold_predictors_dict: dict,
         alpha: float,
+        X: Optional[Iterable] = None,
+        kfold_predictors_dict: Optional[dict] = None,
+        kfold_predictions_dict: Optional[dict] = None,
     ) -> Tuple[np.ndarray]:
         """Compute calibrated prediction intervals for new examples X.
 
-        :param Iterable X: test features.
-        :param dict kfold_predictors_dict: dictionnary of predictors trained
-            on each fold.
         :param float alpha: significance level (maximum miscoverage target).
+        :param Iterable X: test features. Not needed if
+            :data:`kfold_predictions_dict` is provided.
+        :param dict kfold_predictors_dict: dictionnary of predictors trained
+            on each fold. Not needed if :data:`kfold_predictions_dict` is
+            provided.
+        :param dict kfold_predictions_dict: dictionnary of predictions on X
+            of the predictors trained on each fold. If provided, the
+            predictors are not called.
 
         :returns: y_lower, y_upper.
         :rtype: Tuple[ndarray]
+
+        :raises RuntimeError: neither predictions nor predictors and test
+            features are provided.
         """
 
-        # Check if all calibrators have already been fitted
-        self.fit()
+        # Gather the nonconformity scores of all calibrators (cached)
+        (
+            nconf_scores_matrix,
+            fold_offsets,
+        ) = self.get_nonconformity_scores_matrix()
 
         # Check consistency of alpha w.r.t the size of calibration data
         alpha_calib_check(alpha=alpha, n=self._len_calib)
 
-        # Init the collection of upper and lower bounds of the K-fold's PIs
-        concat_y_lo = None
-        concat_y_hi = None
+        if kfold_predictions_dict is None:
+            if X is None or kfold_predictors_dict is None:
+                raise RuntimeError(
+                    "Provide either the K-fold predictions or the K-fold "
+                    + "predictors and the test features."
+                )
+            kfold_predictions_dict = {
+                k: predictor.predict(X)
+                for k, predictor in kfold_predictors_dict.items()
+            }
+
+        # Position of each fold in the concatenated nonconformity scores
+        fold_positions = {
+            k: i for i, k in enumerate(self.kfold_calibrators_dict.keys())
+        }
 
-        for k, predictor in kfold_predictors_dict.items():
-            # Predictions
-            y_pred = predictor.predict(X)
+        # Predictions and nonconformity scores of each fold
+        kfold_data = []
 
+        for k, y_pred in kfold_predictions_dict.items():
             if y_pred is None:
                 raise RuntimeError("No prediction obtained with cv+.")
 
-            # nonconformity scores
+            # nonconformity scores of the k-th fold, viewed in the shared
+            # contiguous buffer
             kth_calibrator = self.kfold_calibrators_dict[k]
-            nconf_scores = kth_calibrator.get_nonconformity_scores()
+            i = fold_positions[k]
+            nconf_scores = nconf_scores_matrix[
+                ..., fold_offsets[i] : fold_offsets[i + 1]
+            ]
 
             # Reshaping nonconformity scores to broadcast them
             # on y_pred samples when computing the prediction sets
             # Source: R. Barber Section 3 https://arxiv.org/pdf/1905.02928.pdf
             y_pred = y_pred[..., np.newaxis]
             if len(nconf_scores.shape) != 2:
-                try:
-                    nconf_scores = np.array(nconf_scores)
-                    nconf_scores = nconf_scores[np.newaxis, ...]
-                except Exception:
-                    # @TODO extend the scope beyond castable to ndarrays
-                    raise RuntimeError(
-                        "Cannot cast nonconformity scores to numpy array."
-                    )
-
-            if concat_y_lo is None or concat_y_hi is None:
-                (concat_y_lo, concat_y_hi) = kth_calibrator.pred_set_func(
-                    y_pred, nconf_scores
+                nconf_scores = nconf_scores[np.newaxis, ...]
+
+            kfold_data.append((kth_calibrator, y_pred, nconf_scores))
+
+        # sanity check
+        if len(kfold_data) == 0:
+            raise RuntimeError("This should never happen.")
+
+        # The aggregated bounds have K*n_calib values per test example. They
+        # are computed by blocks of test examples to bound the memory
+        # footprint instead of materializing them for the whole test set.
+        q = (1 - alpha) * (1 + 1 / self._len_calib)
+        n_test = len(kfold_data[0][1])
+        block_size = max(1, _CV_PLUS_BLOCK_NBYTES // (8 * self._len_calib))
+
+        # Buffers of the aggregated bounds, allocated for the first (largest)
+        # block and reused for the next ones, and output bounds
+        concat_y_lo, concat_y_hi = None, None
+        y_lo, y_hi = None, None
+        for start in range(0, max(n_test, 1), block_size):
+            stop = min(start + block_size, n_test)
+
+            # Collection of upper and lower bounds of the K-fold's PIs
+            kfold_y_lo = []
+            kfold_y_hi = []
+            for kth_calibrator, y_pred, nconf_scores in kfold_data:
+                kth_y_lo, kth_y_hi = kth_calibrator.pred_set_func(
+                    y_pred[start:stop], nconf_scores
                 )
+                kfold_y_lo.append(kth_y_lo)
+                kfold_y_hi.append(kth_y_hi)
+
+            # Single concatenation of the K-fold bounds
+            if concat_y_lo is None:
+                concat_y_lo = np.concatenate(kfold_y_lo, axis=1)
+                concat_y_hi = np.concatenate(kfold_y_hi, axis=1)
+                block_y_lo, block_y_hi = concat_y_lo, concat_y_hi
             else:
-                y_lo, y_hi = kth_calibrator.pred_set_func(y_pred, nconf_scores)
-                concat_y_lo = np.concatenate(
-                    [concat_y_lo, y_lo], axis=1  # type: ignore
+                block_y_lo = np.concatenate(
+                    kfold_y_lo, axis=1, out=concat_y_lo[: stop - start]
+                )
+                block_y_hi = np.concatenate(
+                    kfold_y_hi, axis=1, out=concat_y_hi[: stop - start]
                 )
-                concat_y_hi = np.concatenate([concat_y_hi, y_hi], axis=1)
 
-        # sanity check
-        if concat_y_lo is None or concat_y_hi is None:
-            raise RuntimeError("This should never happen.")
+            block_y_lo, block_y_hi = _cv_plus_bounds(block_y_lo, block_y_hi, q)
 
-        y_lo = -1 * quantile(
-            -1 * concat_y_lo, (1 - alpha) * (1 + 1 / self._len_calib)
-        )
-        y_hi = quantile(concat_y_hi, (1 - alpha) * (1 + 1 / self._len_calib))
+            if y_lo is None:
+                y_lo = np.empty(
+                    (n_test,) + block_y_lo.shape[1:], dtype=block_y_lo.dtype
+                )
+                y_hi = np.empty(
+                    (n_test,) + block_y_hi.shape[1:], dtype=block_y_hi.dtype
+                )
+            y_lo[start:stop] = block_y_lo
+            y_hi[start:stop] = block_y_hi
 
         return y_lo, y_hi
+
+
+def _cv_plus_bounds(
+    concat_y_lo: np.ndarray, concat_y_hi: np.ndarray, q: float
+) -> Tuple[np.ndarray]:
+    """Compute the cv+ bounds from the aggregated K-fold bounds.
+
+    The upper bound is the q-th empirical quantile (inverted CDF, as in
+    :func:`deel.puncc.api.utils.quantile`) of each row of `concat_y_hi`. The
+    lower bound is the opposite of the q-th empirical quantile of
+    `-concat_y_lo`, that is the order statistic of the same rank counted from
+    the top. Both are read from the rows partitioned in place, which avoids
+    allocating negated copies of the aggregated bounds.
+
+    :param ndarray concat_y_lo: aggregated lower bounds, of shape (n, m).
+        Partitioned in place.
+    :param ndarray concat_y_hi: aggregated upper bounds, of shape (n, m).
+        Partitioned in place.
+    :param float q: target quantile order. Must be in the open interval (0, 1).
+
+    :returns: y_lower, y_upper, as views of the partitioned arrays.
+    :rtype: Tuple[ndarray]
+    """
+    if q <= 0 or q >= 1:
+        raise ValueError("q must be in the open interval (0, 1).")
+
+    # Rank of the inverted CDF order statistic, computed as in np.quantile
+    m = concat_y_hi.shape[-1]
+    k = int(np.clip(np.ceil(m * q - 1), 0, m - 1))
+
+    # Only one order statistic is needed: introselect in place instead of a
+    # full sort of the rows
+    concat_y_lo.partition(m - 1 - k, axis=-1)
+    concat_y_hi.partition(k, axis=-1)
+
+    return concat_y_lo[..., m - 1 - k], concat_y_hi[..., k]
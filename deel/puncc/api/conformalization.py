@@ -23,13 +23,17 @@
 """
 This module provides the canvas for conformal prediction.
 """
+import hashlib
 import logging
 import pickle
 from copy import deepcopy
 from typing import Iterable
+from typing import Optional
 from typing import Tuple
 
 import numpy as np
+from joblib import delayed
+from joblib import Parallel
 
 from deel.puncc.api.calibration import BaseCalibrator
 from deel.puncc.api.calibration import CvPlusCalibrator
@@ -38,6 +42,10 @@ from deel.puncc.api.splitting import BaseSplitter
 
 logger = logging.getLogger(__name__)
 
+# Size limit (in bytes) of the features whose predictions are cached. Hashing
+# larger features would cost more than calling the predictors again
+_PREDICT_CACHE_NBYTES = 2**20
+
 
 class ConformalPredictor:
     """Conformal predictor class.
@@ -52,6 +60,8 @@ class ConformalPredictor:
         follow cv+ procedure.
     :param bool train: if False, prediction model(s) will not be (re)trained.
         Defaults to True.
+    :param int n_jobs: number of jobs used to fit the folds in parallel
+        (see :class:`joblib.Parallel`). Defaults to 1 (sequential fit).
 
     .. WARNING::
         if a K-Fold-like splitter is provided with the :data:`train` attribute
@@ -115,6 +125,16 @@ class ConformalPredictor:
 
     """
 
+    __slots__ = (
+        "calibrator",
+        "predictor",
+        "splitter",
+        "method",
+        "train",
+        "n_jobs",
+        "_cv_cp_agg",
+    )
+
     def __init__(
         self,
         calibrator: BaseCalibrator,
@@ -122,14 +142,34 @@ class ConformalPredictor:
         splitter: BaseSplitter,
         method: str = "cv+",
         train: bool = True,
+        n_jobs: int = 1,
     ):
         self.calibrator = calibrator
         self.predictor = predictor
         self.splitter = splitter
         self.method = method
         self.train = train
+        self.n_jobs = n_jobs
         self._cv_cp_agg = None
 
+    def __setstate__(self, state):
+        """Restore the conformal predictor from its pickled state. Conformal
+        predictors pickled before the attributes were declared as slots are
+        supported: their state is a dictionary.
+
+        :param dict|tuple state: pickled state.
+        """
+        # Instances with slots are pickled as (None, slots state)
+        if isinstance(state, tuple):
+            _, state = state
+
+        # Attributes absent from older pickles
+        self.n_jobs = 1
+        self._cv_cp_agg = None
+
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def get_nonconformity_scores(self) -> dict:
         """Getter for computed nonconformity scores on the calibration(s) set(s).
 
@@ -141,7 +181,7 @@ class ConformalPredictor:
         """
 
         if self._cv_cp_agg is None:
-            return RuntimeError("Error: call 'fit' method first.")
+            raise RuntimeError("Error: call 'fit' method first.")
 
         return self._cv_cp_agg.get_nonconformity_scores()
 
@@ -156,7 +196,7 @@ class ConformalPredictor:
         """
 
         if self._cv_cp_agg is None:
-            return RuntimeError("Error: call 'fit' method first.")
+            raise RuntimeError("Error: call 'fit' method first.")
 
         return self._cv_cp_agg.get_weights()
 
@@ -189,71 +229,70 @@ class ConformalPredictor:
         # contains fit and calibration data.
         splits = self.splitter(X, y)
 
+        # Consistency checks, before any model is copied or the aggregator
+        # is altered:
+        #   - In case of multiple split folds, the predictor require training.
+        #     Having 'self.train' set to False is therefore an inconsistency
+        if len(splits) > 1 and not self.train:
+            raise RuntimeError(
+                "Model already trained. This is inconsistent with the"
+                + "cross-validation strategy."
+            )
+
+        #   - Make sure that predictor is already trained if train arg is False
+        if self.train is False and self.predictor.is_trained is False:
+            raise RuntimeError(
+                "'train' argument is set to 'False' but model is not pre-trained"
+            )
+
         # The Cross validation aggregator will aggregate the predictors and
         # calibrators fitted on each of the K splits.
         if self._cv_cp_agg is None or use_cached is False:
             cached_len = 0
             self._cv_cp_agg = CrossValCpAggregator(
-                K=len(splits), method=self.method
+                K=len(splits), method=self.method, n_jobs=self.n_jobs
             )
         else:
             cached_len = self._cv_cp_agg.K
             self._cv_cp_agg.K = cached_len + len(splits)
 
-        # In case of multiple split folds, the predictor require training.
-        # Having 'self.train' set to False is therefore an inconsistency
-        if len(splits) > 1 and not self.train:
-            raise RuntimeError(
-                "Model already trained. This is inconsistent with the"
-                + "cross-validation strategy."
-            )
-
         # Core loop: for each split (that contains fit and calib data):
         #   1- The predictor f_i is fitted of (X_fit, y_fit) (if necessary)
         #   2- y_pred is predicted by f_i
         #   3- The calibrator is fitted to approximate the distribution of
         #      nonconformity scores
-        for i, (X_fit, y_fit, X_calib, y_calib) in enumerate(splits):
-            # Make local copies of the structure of the predictor and the calibrator.
-            # In case of a K-fold like splitting strategy, these structures are
-            # inherited by the predictor/calibrator used in each fold.
-            predictor = self.predictor.copy()
-            calibrator = deepcopy(self.calibrator)
-
-            if self.train:
-                logger.info(f"Fitting model on fold {i+cached_len}")
-                predictor.fit(X_fit, y_fit, **kwargs)  # Fit K-fold predictor
-
-            # Make sure that predictor is already trained if train arg is False
-            elif self.train is False and predictor.is_trained is False:
-                raise RuntimeError(
-                    "'train' argument is set to 'False' but model is not pre-trained"
-                )
-
-            else:  # Skipping training
-                logger.info("Skipping training.")
-
-            # Call predictor to estimate predictions
-            logger.info(f"Model predictions on X_calib fold {i+cached_len}")
-            y_pred = predictor.predict(X_calib)
-            logger.debug("Shape of y_pred")
-
-            # Fit calibrator
-            logger.info(f"Fitting calibrator on fold {i+cached_len}")
-            calibrator.fit(y_true=y_calib, y_pred=y_pred)
-
-            # Compute normalized weights of the nonconformity scores
-            # if a weight function is provided
-            if calibrator.weight_func:
-                weights = calibrator.weight_func(X_calib)
-                norm_weights = calibrator.barber_weights(weights=weights)
-                # Store the mornalized weights
-                calibrator.set_norm_weights(norm_weights)
+        # The splits are independent from each other, they are processed
+        # in parallel if n_jobs != 1.
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_one_fold)(
+                self.predictor,
+                self.calibrator,
+                X_fit,
+                y_fit,
+                X_calib,
+                y_calib,
+                train=self.train,
+                fold=i + cached_len,
+                **kwargs,
+            )
+            for i, (X_fit, y_fit, X_calib, y_calib) in enumerate(splits)
+        )
 
-            # Add predictor and calibrator to the collection that is used later
-            # by the predict method
-            self._cv_cp_agg.append_predictor(i + cached_len, predictor)
-            self._cv_cp_agg.append_calibrator(i + cached_len, calibrator)
+        # Add predictors and calibrators to the collection that is used later
+        # by the predict method. They were created for this fold only, so
+        # they do not need to be copied again.
+        for fold, predictor, calibrator in results:
+            self._cv_cp_agg.append_predictor(fold, predictor, copy=False)
+            self._cv_cp_agg.append_calibrator(fold, calibrator, copy=False)
+
+        # Each fold predictor comes with its calibrator. The check is done
+        # once here rather than at each prediction.
+        predictors = self._cv_cp_agg._predictors
+        calibrators = self._cv_cp_agg._calibrators
+        assert len(predictors) == len(calibrators) and all(
+            p is not None and c is not None
+            for p, c in zip(predictors, calibrators)
+        ), "K-fold predictors are not well calibrated."
 
     def predict(self, X: Iterable, alpha: float) -> Tuple[np.ndarray]:
         """Predict point, and interval estimates for X data.
@@ -275,8 +314,9 @@ class ConformalPredictor:
 
         :param str path: file path.
         """
+        saved_dict = {key: getattr(self, key) for key in self.__slots__}
         with open(path, "wb") as output_file:
-            pickle.dump(self.__dict__, output_file)
+            pickle.dump(saved_dict, output_file)
 
     @staticmethod
     def load(path):
@@ -291,55 +331,228 @@ class ConformalPredictor:
             saved_dict = pickle.load(input_file)
 
         loaded_cp = ConformalPredictor(None, None, None)
-        loaded_cp.__dict__.update(saved_dict)
+        for key, value in saved_dict.items():
+            setattr(loaded_cp, key, value)
         return loaded_cp
 
 
+def _cache_key(X: Iterable) -> Optional[Tuple]:
+    """Compute a key that identifies the content of X. The key is used to
+    cache predictions.
+
+    :param Iterable X: features.
+
+    :returns: key of X, or None if X cannot be hashed or is larger than
+        :data:`_PREDICT_CACHE_NBYTES` (in which case predictions are not
+        cached).
+    :rtype: Optional[Tuple]
+    """
+    if (
+        not isinstance(X, np.ndarray)
+        or X.dtype.hasobject
+        or X.nbytes > _PREDICT_CACHE_NBYTES
+    ):
+        return None
+    digest = hashlib.blake2b(np.ascontiguousarray(X).data).digest()
+    return (X.shape, X.dtype.str, digest)
+
+
+def _fit_one_fold(
+    predictor,
+    calibrator: BaseCalibrator,
+    X_fit: Iterable,
+    y_fit: Iterable,
+    X_calib: Iterable,
+    y_calib: Iterable,
+    *,
+    train: bool,
+    fold: int,
+    **kwargs,
+) -> Tuple:
+    """Fit a predictor and a calibrator on a single fit/calibration split.
+
+    The predictor is copied and the calibrator is cloned (unfitted) before
+    fitting, so that each fold owns its own instances. If the predictor
+    implements a `fit_predict(X_fit, y_fit, X_calib, **kwargs)` method, it is
+    used to train the predictor and predict X_calib in a single call.
+
+    :param BasePredictor|DualPredictor predictor: predictor to be copied and
+        fitted on (X_fit, y_fit).
+    :param BaseCalibrator calibrator: calibrator to be cloned and fitted on
+        (X_calib, y_calib).
+    :param Iterable X_fit: fit features.
+    :param Iterable y_fit: fit labels.
+    :param Iterable X_calib: calibration features.
+    :param Iterable y_calib: calibration labels.
+    :param bool train: if False, the predictor is not (re)trained. It is
+        then expected to be already trained.
+    :param int fold: index of the fold.
+    :param dict kwargs: options configuration for the training.
+
+    :returns: fold index, fitted predictor and fitted calibrator.
+    :rtype: Tuple
+    """
+    # Make local copies of the structure of the predictor and the calibrator.
+    # In case of a K-fold like splitting strategy, these structures are
+    # inherited by the predictor/calibrator used in each fold.
+    predictor = predictor.copy()
+    calibrator = calibrator.clone()
+
+    # Predictors that expose a `fit_predict` method train and predict on
+    # X_calib in a single pass
+    use_fit_predict = train and callable(
+        getattr(predictor, "fit_predict", None)
+    )
+
+    if use_fit_predict:
+        logger.info(f"Fitting model and predicting X_calib on fold {fold}")
+        y_pred = predictor.fit_predict(X_fit, y_fit, X_calib, **kwargs)
+
+    elif train:
+        logger.info(f"Fitting model on fold {fold}")
+        predictor.fit(X_fit, y_fit, **kwargs)  # Fit K-fold predictor
+
+    else:  # Skipping training
+        logger.info("Skipping training.")
+
+    # Call predictor to estimate predictions
+    if not use_fit_predict:
+        logger.info(f"Model predictions on X_calib fold {fold}")
+        y_pred = predictor.predict(X_calib)
+        logger.debug("Shape of y_pred")
+
+    # Fit calibrator
+    logger.info(f"Fitting calibrator on fold {fold}")
+    calibrator.fit(y_true=y_calib, y_pred=y_pred)
+
+    # Compute normalized weights of the nonconformity scores
+    # if a weight function is provided
+    if calibrator.weight_func:
+        weights = calibrator.weight_func(X_calib)
+        norm_weights = calibrator.barber_weights(weights=weights)
+        # Store the mornalized weights
+        calibrator.set_norm_weights(norm_weights)
+
+    return fold, predictor, calibrator
+
+
+def _grow(collection: list, size: int) -> None:
+    """Extend a list with None values so that it holds at least `size`
+    elements.
+
+    :param list collection: list to be extended in place.
+    :param int size: minimal size of the list.
+    """
+    if len(collection) < size:
+        collection.extend([None] * (size - len(collection)))
+
+
 class CrossValCpAggregator:
     """This class enables to aggregate predictions and calibrations
     from different K-folds.
 
 
     :param int K: number of folds
-    :param dict _predictors: collection of predictors fitted on the K-folds
-    :param dict _calibrators: collection of calibrators fitted on the K-folds
+    :param list _predictors: collection of predictors fitted on the K-folds,
+        indexed by fold
+    :param list _calibrators: collection of calibrators fitted on the K-folds,
+        indexed by fold
     :param str method: method to handle the ensemble prediction and
         calibration, defaults to 'cv+'.
+    :param int n_jobs: number of jobs used to compute the predictions of the
+        K-fold predictors in parallel. Defaults to 1 (sequential).
     """
 
+    __slots__ = (
+        "K",
+        "n_jobs",
+        "method",
+        "_predictors",
+        "_calibrators",
+        "_predict_cache",
+        "_cvp_calibrator",
+    )
+
     def __init__(
         self,
         K: int,
         method: str = "cv+",
+        n_jobs: int = 1,
     ):
         self.K = K  # Number of K-folds
-        self._predictors = {}
-        self._calibrators = {}
-
-        if method not in ("cv+"):
+        self.n_jobs = n_jobs
+        # Predictors and calibrators, indexed by fold
+        self._predictors = [None] * K
+        self._calibrators = [None] * K
+        # Last computed K-fold predictions, as a couple (key of X, predictions)
+        self._predict_cache = None
+        # Aggregation of the K-fold calibrators, built lazily
+        self._cvp_calibrator = None
+
+        if method not in ("cv+",):
             raise NotImplementedError(
                 f"Method {method} is not implemented. " + "Please choose 'cv+'."
             )
 
         self.method = method
 
-    def append_predictor(self, key, predictor):
-        """Add predictor in kfold predictors dictionnary.
+    def __setstate__(self, state):
+        """Restore the aggregator from its pickled state. Aggregators
+        pickled before the attributes were declared as slots are supported:
+        their state is a dictionary whose predictors and calibrators are
+        themselves dictionaries indexed by fold.
 
-        :param int key: key of the predictor.
+        :param dict|tuple state: pickled state.
+        """
+        # Instances with slots are pickled as (None, slots state)
+        if isinstance(state, tuple):
+            _, state = state
+
+        # Attributes absent from older pickles
+        self.n_jobs = 1
+        self._predict_cache = None
+        self._cvp_calibrator = None
+
+        for key, value in state.items():
+            if key in ("_predictors", "_calibrators") and isinstance(
+                value, dict
+            ):
+                collection = []
+                for fold, element in value.items():
+                    _grow(collection, fold + 1)
+                    collection[fold] = element
+                value = collection
+            setattr(self, key, value)
+
+    def append_predictor(self, key, predictor, copy: bool = True):
+        """Add predictor in kfold predictors collection.
+
+        :param int key: fold index of the predictor.
         :param BasePredictor|DualPredictor predictor: predictor to be appended.
+        :param bool copy: if True, a copy of the predictor is stored.
+            Otherwise, the predictor is stored as is and the caller is
+            expected to provide an instance that is not shared with other
+            folds. Defaults to True.
 
         """
-        self._predictors[key] = predictor.copy()
+        _grow(self._predictors, key + 1)
+        self._predictors[key] = predictor.copy() if copy else predictor
+        self._predict_cache = None
 
-    def append_calibrator(self, key, calibrator):
-        """Add calibrator in kfold calibrators dictionnary.
+    def append_calibrator(self, key, calibrator, copy: bool = True):
+        """Add calibrator in kfold calibrators collection.
 
-        :param int key: key of the calibrator.
+        :param int key: fold index of the calibrator.
         :param BaseCalibrator predictor: calibrator to be appended.
+        :param bool copy: if True, a copy of the calibrator is stored.
+            Otherwise, the calibrator is stored as is and the caller is
+            expected to provide an instance that is not shared with other
+            folds. Defaults to True.
 
         """
-        self._calibrators[key] = deepcopy(calibrator)
+        _grow(self._calibrators, key + 1)
+        self._calibrators[key] = deepcopy(calibrator) if copy else calibrator
+        self._cvp_calibrator = None
 
     def get_nonconformity_scores(self) -> dict:
         """Get a dictionnary of residuals computed on the K-folds.
@@ -349,7 +562,7 @@ class CrossValCpAggregator:
         """
         return {
             k: calibrator.get_nonconformity_scores()
-            for k, calibrator in self._calibrators.items()
+            for k, calibrator in enumerate(self._calibrators)
         }
 
     def get_weights(self) -> dict:
@@ -359,10 +572,66 @@ class CrossValCpAggregator:
         :rtype: dict
         """
         return {
-            k: calibrator.get_weights()
-            for k, calibrator in self._calibrators.items()
+            k: calibrator.get_norm_weights()
+            for k, calibrator in enumerate(self._calibrators)
         }
 
+    def get_residuals_matrix(self) -> Tuple[np.ndarray]:
+        """Get the residuals computed on the K-folds, concatenated in a single
+        contiguous array, along with the fold offsets: the residuals of the
+        :math:`k`-th fold are found between `fold_offsets[k]` and
+        `fold_offsets[k+1]`.
+
+        The concatenation is computed once and cached until a new calibrator
+        is appended.
+
+        :returns: concatenated residuals and fold offsets.
+        :rtype: Tuple[ndarray]
+        """
+        return self._get_cvp_calibrator().get_nonconformity_scores_matrix()
+
+    def _get_cvp_calibrator(self) -> CvPlusCalibrator:
+        if self._cvp_calibrator is None:
+            self._cvp_calibrator = CvPlusCalibrator(
+                dict(enumerate(self._calibrators))
+            )
+        return self._cvp_calibrator
+
+    def _predict_kfold(self, X: Iterable) -> list:
+        """Compute the predictions of each K-fold predictor on X.
+
+        The predictions are computed in parallel if :data:`n_jobs` != 1. The
+        last computed predictions are cached, so that consecutive calls on the
+        same data (e.g. for several values of alpha) do not call the
+        predictors again. Only small numpy features are cached, see
+        :func:`_cache_key`.
+
+        :param Iterable X: features.
+
+        :returns: list of predictions indexed by the K-fold number.
+        :rtype: list
+        """
+        key = _cache_key(X)
+        if (
+            key is not None
+            and self._predict_cache is not None
+            and self._predict_cache[0] == key
+        ):
+            return self._predict_cache[1]
+
+        # Each predictor infers independently on X
+        if len(self._predictors) == 1:
+            kfold_preds = [self._predictors[0].predict(X)]
+        else:
+            kfold_preds = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(predictor.predict)(X) for predictor in self._predictors
+            )
+
+        if key is not None:
+            self._predict_cache = (key, kfold_preds)
+
+        return kfold_preds
+
     def predict(
         self, X: Iterable, alpha: float
     ) -> Tuple[np.ndarray]:  #  type: ignore
@@ -374,33 +643,34 @@ class CrossValCpAggregator:
         :returns: y_pred, y_lower, y_higher.
         :rtype: Tuple[Iterable]
         """
-        assert (
-            self._predictors.keys() == self._calibrators.keys()
-        ), "K-fold predictors are not well calibrated."
-
-        K = len(self._predictors.keys())  # Number of folds
+        K = len(self._predictors)  # Number of folds
 
         # No cross-val strategy if K = 1
         if K == 1:
-            for k in self._predictors.keys():
-                predictor = self._predictors[k]
-                calibrator = self._calibrators[k]
-                # Get normalized weights of the nonconformity scores
-                norm_weights = calibrator.get_norm_weights()
-                y_pred = predictor.predict(X=X)
-                set_pred = calibrator.calibrate(
-                    alpha=alpha, y_pred=y_pred, weights=norm_weights
-                )
-                return (y_pred, *set_pred)
+            (y_pred,) = self._predict_kfold(X)
+            calibrator = self._calibrators[0]
+            # Get normalized weights of the nonconformity scores
+            norm_weights = calibrator.get_norm_weights()
+            set_pred = calibrator.calibrate(
+                alpha=alpha, y_pred=y_pred, weights=norm_weights
+            )
+            # Return a copy of cached predictions so that they are not
+            # altered by in-place modifications of the output
+            if (
+                self._predict_cache is not None
+                and self._predict_cache[1][0] is y_pred
+            ):
+                y_pred = np.copy(y_pred)
+            return (y_pred, *set_pred)
 
         else:
             y_pred = None
 
             if self.method == "cv+":
-                cvp_calibrator = CvPlusCalibrator(self._calibrators)
-                set_pred = cvp_calibrator.calibrate(
-                    X=X,
-                    kfold_predictors_dict=self._predictors,
+                set_pred = self._get_cvp_calibrator().calibrate(
+                    kfold_predictions_dict=dict(
+                        enumerate(self._predict_kfold(X))
+                    ),
                     alpha=alpha,
                 )
                 return (y_pred, *set_pred)  # type: ignore
@@ -25,9 +25,11 @@ This module provides data splitting schemes.
 """
 import pkgutil
 from abc import ABC
+from collections.abc import Sequence
 from typing import Iterable
 from typing import List
 from typing import Tuple
+from typing import Union
 
 import numpy as np
 from sklearn import model_selection
@@ -129,9 +131,19 @@ class RandomSplitter(BaseSplitter):
         sample_len_check(X, y)
 
         rng = np.random.RandomState(seed=self.random_state)
-        fit_idxs = rng.rand(len(X)) > self.ratio
-        cal_idxs = np.invert(fit_idxs)
-        return [(X[fit_idxs], y[fit_idxs], X[cal_idxs], y[cal_idxs])]
+        fit_mask = rng.rand(len(X)) > self.ratio
+        # Gathering by integer indices is faster than boolean masking, and
+        # the indices are computed once for both features and labels
+        fit_idxs = np.flatnonzero(fit_mask)
+        cal_idxs = np.flatnonzero(np.invert(fit_mask))
+        return [
+            (
+                _take(X, fit_idxs),
+                _take(y, fit_idxs),
+                _take(X, cal_idxs),
+                _take(y, cal_idxs),
+            )
+        ]
 
 
 class KFoldSplitter(BaseSplitter):
@@ -151,15 +163,16 @@ class KFoldSplitter(BaseSplitter):
         self,
         X: Iterable,
         y: Iterable,
-    ) -> List[Tuple[Iterable]]:
+    ) -> Sequence:
         """Implements a K-fold split strategy.
 
         :param Iterabler X: features array.
         :param Iterable y: labels array.
 
-        :returns: list of K split folds. Each fold is a tuple
-            (X_fit, y_fit, X_calib, y_calib).
-        :rtype: List[Tuple[Iterable]]
+        :returns: sequence of K split folds. Each fold is a tuple
+            (X_fit, y_fit, X_calib, y_calib) and is materialized when
+            accessed.
+        :rtype: Sequence[Tuple[Iterable]]
         """
         # Checks
         supported_types_check(X, y)
@@ -168,28 +181,67 @@ class KFoldSplitter(BaseSplitter):
         kfold = model_selection.KFold(
             self.K, shuffle=True, random_state=self.random_state
         )
-        folds = []
-
-        for fit, calib in kfold.split(X):
-            if pkgutil.find_loader("pandas") is not None and isinstance(
-                X, pd.DataFrame
-            ):
-                if isinstance(y, pd.DataFrame):
-                    folds.append(
-                        (X.iloc[fit], y.iloc[fit], X.iloc[calib], y.iloc[calib])
-                    )
-                else:
-                    folds.append((X.iloc[fit], y[fit], X.iloc[calib], y[calib]))
-
-            else:
-                bool_fit_idx = np.array([i in fit for i in range(len(X))])
-                folds.append(
-                    (
-                        X[bool_fit_idx],
-                        y[bool_fit_idx],
-                        X[~bool_fit_idx],
-                        y[~bool_fit_idx],
-                    )
-                )
-
-        return folds
+
+        # Only the indices of the folds are computed here. The fit and
+        # calibration subsets are materialized when each fold is accessed,
+        # which avoids holding the K folds' data in memory simultaneously.
+        # Indices are sorted to preserve the original ordering of samples.
+        fold_idxs = [(fit, np.sort(calib)) for fit, calib in kfold.split(X)]
+
+        return _LazySplits(X, y, fold_idxs)
+
+
+def _take(a: Iterable, idxs: np.ndarray) -> Iterable:
+    """Select samples of `a` given their (sorted) indices.
+
+    :param Iterable a: array, dataframe or tensor.
+    :param ndarray idxs: indices of samples to be selected.
+
+    :returns: selected samples.
+    :rtype: Iterable
+    """
+    if pkgutil.find_loader("pandas") is not None and isinstance(
+        a, (pd.DataFrame, pd.Series)
+    ):
+        return a.iloc[idxs]
+
+    if isinstance(a, np.ndarray):
+        return a[idxs]
+
+    # Tensors do not support indexing by integer arrays: use a boolean mask
+    mask = np.zeros(len(a), dtype=bool)
+    mask[idxs] = True
+    return a[mask]
+
+
+class _LazySplits(Sequence):
+    """Sequence of fit/calibration splits that are materialized on access.
+    Only the indices of the samples assigned to each split are stored.
+
+    :param Iterable X: features array.
+    :param Iterable y: labels array.
+    :param List[Tuple[ndarray]] fold_idxs: list of (fit, calib) indices.
+    """
+
+    def __init__(
+        self, X: Iterable, y: Iterable, fold_idxs: List[Tuple[np.ndarray]]
+    ):
+        self._X = X
+        self._y = y
+        self._fold_idxs = fold_idxs
+
+    def __len__(self) -> int:
+        return len(self._fold_idxs)
+
+    def __getitem__(self, index: Union[int, slice]):
+        # A slice of the splits is itself materialized on access
+        if isinstance(index, slice):
+            return _LazySplits(self._X, self._y, self._fold_idxs[index])
+
+        fit, calib = self._fold_idxs[index]
+        return (
+            _take(self._X, fit),
+            _take(self._y, fit),
+            _take(self._X, calib),
+            _take(self._y, calib),
+        )
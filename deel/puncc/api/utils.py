@@ -24,6 +24,7 @@
 This module implements utility functions.
 """
 import logging
+import math
 import pkgutil
 import sys
 from typing import Any
@@ -242,18 +243,13 @@ def get_min_max_alpha_calib(
     return (1 / (n + 1), 1)
 
 
-def quantile(a: Iterable, q: float, w: np.ndarray = None) -> np.ndarray:  # type: ignore
-    """Estimate the q-th empirical weighted quantiles.
+def _to_numpy(a: Iterable) -> np.ndarray:
+    """Convert a supported iterable to a numpy array.
 
-    :param Iterable a: collection of n samples
-    :param float q: target quantile order. Must be in the open interval (0, 1).
-    :param ndarray w: vector of size n. By default, w is None and equal weights
-        (:math:`1/n`) are associated.
+    :param Iterable a: iterable whose type is supported.
 
-    :returns: weighted empirical quantiles.
+    :returns: array with the values of `a`.
     :rtype: ndarray
-
-    :raises NotImplementedError: `a` must be unidimensional.
     """
     # type checks:
     supported_types_check(a)
@@ -274,19 +270,19 @@ def quantile(a: Iterable, q: float, w: np.ndarray = None) -> np.ndarray:  # type
     else:
         raise RuntimeError("Fatal error.")
 
-    # Sanity checks
-    if q <= 0 or q >= 1:
-        raise ValueError("q must be in the open interval (0, 1).")
+    return a
 
-    # Case of None weights
-    if w is None:
-        return np.quantile(a, q=q, axis=-1, method="inverted_cdf")
-        ## An equivalent method would be to assign equal values to w
-        ## and carry on with the computations.
-        ## np.quantile is however more optimized.
-        # w = np.ones_like(a) / len(a)
 
-    # Sanity checks
+def _weights_check(a: np.ndarray, w: np.ndarray):
+    """Check if weights are consistent with the samples `a` and normalized.
+
+    :param ndarray a: collection of n samples.
+    :param ndarray w: vector of size n.
+
+    :raises NotImplementedError: `w` is not unidimensional.
+    :raises RuntimeError: `w` does not match the last axis of `a` or is not
+        normalized.
+    """
     if w.ndim > 1:
         raise NotImplementedError(f"w dimension is {w.ndim}; should be 1.")
 
@@ -297,17 +293,138 @@ def quantile(a: Iterable, q: float, w: np.ndarray = None) -> np.ndarray:  # type
         )
         raise RuntimeError(error)
 
-    # Normalization check
-    norm_condition = np.isclose(np.sum(w, axis=-1) - 1, 0, atol=1e-14)
-    if ~np.all(norm_condition):
-        error = (
-            "W is not normalized. Sum of weights on"
-            + f"rows is {np.sum(w, axis=-1)}"
-        )
+    # Normalization check, on the scalar sum of the weights
+    sum_w = float(np.sum(w))
+    if not math.isclose(sum_w, 1, rel_tol=0, abs_tol=1e-14):
+        error = "W is not normalized. Sum of weights on" + f"rows is {sum_w}"
         raise RuntimeError(error)
 
+
+def _weighted_quantiles(a: np.ndarray, q, w: np.ndarray) -> np.ndarray:
+    """Compute the weighted empirical quantiles of a vector for one or several
+    orders. The samples are sorted and their weights cumulated only once.
+
+    :param ndarray a: vector of n samples.
+    :param float|ndarray q: quantile order(s).
+    :param ndarray w: normalized weights, vector of size n.
+
+    :returns: weighted empirical quantiles, of the shape of `q`.
+    :rtype: ndarray
+    """
+    ## Values are sorted in ascending order
+    sorted_idxs = np.argsort(a)
+
+    ## Reorder weights (ascending values of a) and compute cumulative sum
+    sorted_cumsum_w = np.cumsum(w[sorted_idxs])
+
+    ## The first value whose probability mass reaches q is found by binary
+    ## search on the cumulative sum of weights. The mass may fall slightly
+    ## short of q due to rounding errors.
+    ks = np.searchsorted(sorted_cumsum_w, q, side="left")
+    ks = np.minimum(ks, len(sorted_cumsum_w) - 1)
+    return a[sorted_idxs[ks]]
+
+
+def _inverted_cdf_quantile(a: np.ndarray, q: float) -> np.ndarray:
+    """Compute the q-th empirical quantile along the last axis of `a`. The
+    result is the same as :code:`np.quantile(a, q, axis=-1,
+    method="inverted_cdf")`, but the order statistic is selected by partial
+    sorting.
+
+    :param ndarray a: collection of n samples.
+    :param float q: quantile order, in the open interval (0, 1).
+
+    :returns: empirical quantiles.
+    :rtype: ndarray
+    """
+    n = a.shape[-1]
+    if n == 0 or a.dtype.hasobject:
+        return np.quantile(a, q=q, axis=-1, method="inverted_cdf")
+
+    k = int(np.clip(np.ceil(n * q - 1), 0, n - 1))
+    # The last order statistic is put in place as well: NaN values are moved
+    # there and are propagated as in np.quantile
+    partitioned_a = np.partition(a, np.unique([k, n - 1]), axis=-1)
+    quantiles_a = partitioned_a[..., k]
+    if a.dtype.kind in "fc":
+        quantiles_a = np.where(
+            np.isnan(partitioned_a[..., -1]), np.nan, quantiles_a
+        )
+    # Scalar for a vector
+    return quantiles_a[()]
+
+
+def quantiles(a: Iterable, q: Iterable, w: np.ndarray = None) -> np.ndarray:
+    """Estimate the empirical weighted quantiles of a vector for several
+    orders at once. The result is the same as calling :func:`quantile` for
+    each order, but the samples are sorted only once.
+
+    :param Iterable a: collection of n samples.
+    :param Iterable q: target quantile orders. Each one must be in the open
+        interval (0, 1).
+    :param ndarray w: vector of size n. By default, w is None and equal weights
+        (:math:`1/n`) are associated.
+
+    :returns: weighted empirical quantiles, of the shape of `q`.
+    :rtype: ndarray
+
+    :raises NotImplementedError: `a` must be unidimensional.
+    """
+    a = _to_numpy(a)
+    q = np.asarray(q)
+
+    # Sanity checks
+    if np.any(q <= 0) or np.any(q >= 1):
+        raise ValueError("q must be in the open interval (0, 1).")
+
+    if a.ndim != 1:
+        raise NotImplementedError(f"a dimension is {a.ndim}; should be 1.")
+
+    # Case of None weights
+    if w is None:
+        return np.quantile(a, q=q, method="inverted_cdf")
+
+    _weights_check(a, w)
+
+    return _weighted_quantiles(a, q, w)
+
+
+def quantile(a: Iterable, q: float, w: np.ndarray = None) -> np.ndarray:  # type: ignore
+    """Estimate the q-th empirical weighted quantiles.
+
+    :param Iterable a: collection of n samples
+    :param float q: target quantile order. Must be in the open interval (0, 1).
+    :param ndarray w: vector of size n. By default, w is None and equal weights
+        (:math:`1/n`) are associated.
+
+    :returns: weighted empirical quantiles.
+    :rtype: ndarray
+
+    :raises NotImplementedError: `a` must be unidimensional.
+    """
+    a = _to_numpy(a)
+
+    # Sanity checks
+    if q <= 0 or q >= 1:
+        raise ValueError("q must be in the open interval (0, 1).")
+
+    # Case of None weights
+    if w is None:
+        return _inverted_cdf_quantile(a, q)
+        ## An equivalent method would be to assign equal values to w
+        ## and carry on with the computations.
+        ## Selecting the order statistic is however more optimized.
+        # w = np.ones_like(a) / len(a)
+
+    # Sanity checks
+    _weights_check(a, w)
+
     # Empirical Weighted Quantile
 
+    # Compute quantile on one sample (vector)
+    if a.ndim == 1:
+        return _weighted_quantiles(a, q, w)
+
     ## Row values are sorted in ascending order
     sorted_idxs = np.argsort(a, -1)
     logger.debug(f"Sorted indices: {sorted_idxs}")
@@ -316,11 +433,6 @@ def quantile(a: Iterable, q: float, w: np.ndarray = None) -> np.ndarray:  # type
     sorted_cumsum_w = np.cumsum(w[sorted_idxs], axis=-1)
     logger.debug(f"Sorted weights cumulative sum: {sorted_cumsum_w}")
 
-    # Compute quantile on one sample (vector)
-    if sorted_cumsum_w.ndim == 1:
-        weighted_quantile_idxs = sorted_idxs[sorted_cumsum_w >= q][0]
-        return a[weighted_quantile_idxs]
-
     # Compute quantile on several samples (matrix)
     ## Collect in a list indices for which the cumulative sum of weights on each
     ## row exceeds q
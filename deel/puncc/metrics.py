@@ -126,3 +126,66 @@ def regression_sharpness(y_pred_lower, y_pred_upper) -> float:
     :rtype: float
     """
     return (np.abs(y_pred_upper - y_pred_lower)).mean()
+
+
+def regression_mean_coverage_grid(
+    y_true, y_pred_lower, y_pred_upper
+) -> np.ndarray:
+    """Compute the average coverage of several sets of prediction intervals
+    at once, e.g. obtained for a grid of significance levels. The result is
+    the same as calling :func:`regression_mean_coverage` on each set.
+
+    :param ndarray y_true: label true values, of shape (n,).
+    :param ndarray y_pred_lower: lower bounds of the prediction intervals, of
+        shape (n_sets, n).
+    :param ndarray y_pred_upper: upper bounds of the prediction intervals, of
+        shape (n_sets, n).
+
+    :returns: average coverage of each set, of shape (n_sets,).
+    :rtype: ndarray
+    """
+    # The bounds may broadcast to different shapes, e.g. a single lower bound
+    # for a grid of upper bounds, so the masks are not combined in place
+    covered = np.greater_equal(y_true, y_pred_lower) & np.less_equal(
+        y_true, y_pred_upper
+    )
+    return covered.mean(axis=-1)
+
+
+def regression_ace_grid(
+    y_true, y_pred_lower, y_pred_upper, alphas
+) -> np.ndarray:
+    """Compute the Average Coverage Error (ACE) of several sets of prediction
+    intervals at once. The result is the same as calling
+    :func:`regression_ace` on each set.
+
+    :param ndarray y_true: label true values, of shape (n,).
+    :param ndarray y_pred_lower: lower bounds of the prediction intervals, of
+        shape (n_alphas, n).
+    :param ndarray y_pred_upper: upper bounds of the prediction intervals, of
+        shape (n_alphas, n).
+    :param ndarray alphas: significance levels of each set, of shape
+        (n_alphas,).
+
+    :returns: the average coverage error of each set, of shape (n_alphas,).
+    :rtype: ndarray
+    """
+    cov = regression_mean_coverage_grid(y_true, y_pred_lower, y_pred_upper)
+    return cov - (1 - np.asarray(alphas))
+
+
+def regression_sharpness_grid(y_pred_lower, y_pred_upper) -> np.ndarray:
+    """Compute the average absolute width of several sets of prediction
+    intervals at once. The result is the same as calling
+    :func:`regression_sharpness` on each set.
+
+    :param ndarray y_pred_lower: lower bounds of the prediction intervals, of
+        shape (n_sets, n).
+    :param ndarray y_pred_upper: upper bounds of the prediction intervals, of
+        shape (n_sets, n).
+
+    :returns: average absolute width of each set, of shape (n_sets,).
+    :rtype: ndarray
+    """
+    widths = np.subtract(y_pred_upper, y_pred_lower)
+    return np.abs(widths, out=widths).mean(axis=-1)
@@ -151,18 +151,20 @@ def plot_prediction_intervals(
 
     """
 
-    # Figure size configuration
-    if "figsize" in fig_kw.keys():
-        figsize = fig_kw["figsize"]
-    else:
-        figsize = (15, 6)
+    # Figure size and legend location configuration
+    figsize = fig_kw.get("figsize", (15, 6))
+    loc = fig_kw.get("loc", "upper left")
 
     # Create new figure and ax if None provided
     if ax is None:
         _, ax = plt.subplots(figsize=figsize)
-        # Before changing rcparams, save old config to restablish is later
+        # Before changing rcparams, save old config to restablish is later.
+        # Only the customized parameters are saved and restored, rather than
+        # validating the whole configuration again.
         restablish_rcparams = True
-        current_rcparams = dict(matplotlib.rcParams)
+        current_rcparams = {
+            key: matplotlib.rcParams[key] for key in custom_rc_params
+        }
         # Custom matplotlib style sheet
         matplotlib.rcParams.update(custom_rc_params)
     else:
@@ -189,15 +191,18 @@ def plot_prediction_intervals(
 
     # Coverage count
     if plot_interval:
-        miscoverage = (y_true > y_pred_upper) | (y_true < y_pred_lower)
+        # The two comparisons are combined in the first boolean array
+        miscoverage = np.greater(y_true, y_pred_upper)
+        miscoverage |= np.less(y_true, y_pred_lower)
     else:  # No interval given, so no miscoverage
-        miscoverage = np.array([False for _ in range(len(y_true))])
+        miscoverage = np.zeros(len(y_true), dtype=bool)
+    coverage = ~miscoverage
 
     # plot observations inside PI
     label = "Observation (inside PI)" if plot_interval else "Observation"
     ax.plot(
-        X[~miscoverage],
-        y_true[~miscoverage],
+        X[coverage],
+        y_true[coverage],
         "darkgreen",
         marker="o",
         markersize=4,
@@ -240,11 +245,6 @@ def plot_prediction_intervals(
     ax.set_xlabel("X")
     ax.set_ylabel("Y")
 
-    if "loc" not in fig_kw.keys():
-        loc = "upper left"
-    else:
-        loc = fig_kw["loc"]
-
     ax.legend(loc=loc)
 
     # Set x limits
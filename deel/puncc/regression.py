@@ -23,13 +23,14 @@
 """
 This module implements usual conformal regression wrappers.
 """
-from copy import deepcopy
 from typing import Iterable
 from typing import Optional
 from typing import Tuple
 
 import numpy as np
-from sklearn.utils import resample
+from joblib import delayed
+from joblib import Parallel
+from sklearn.utils import check_random_state
 
 from deel.puncc.api import nonconformity_scores
 from deel.puncc.api import prediction_sets
@@ -437,6 +438,9 @@ class CVPlus:
     :param BasePredictor predictor: a predictor implementing fit and predict.
     :param int K: number of training/calibration folds.
     :param int random_state: seed to control random folds.
+    :param int n_jobs: number of jobs used to fit the K folds in parallel
+        and to compute their predictions in parallel threads (see
+        :class:`joblib.Parallel`). Defaults to 1 (sequential).
 
 
     Example::
@@ -485,7 +489,9 @@ class CVPlus:
 
     """
 
-    def __init__(self, predictor, *, K: int, random_state=None):
+    def __init__(
+        self, predictor, *, K: int, random_state=None, n_jobs: int = 1
+    ):
         self.predictor = predictor
         self.calibrator = BaseCalibrator(
             nonconf_score_func=nonconformity_scores.mad,
@@ -499,6 +505,7 @@ class CVPlus:
             calibrator=self.calibrator,
             splitter=self.splitter,
             method="cv+",
+            n_jobs=n_jobs,
         )
 
     def fit(
@@ -568,6 +575,13 @@ of the exchangeability assumption.
 """
 
 
+# Memory budget (in bytes) of the LOO predictions computed at once by EnbPI
+_LOO_BLOCK_NBYTES = 2**23
+# Memory budget (in bytes) under which EnbPI predicts all the test samples
+# with a single call to each bootstrap model
+_STACKED_PREDICT_NBYTES = 2**26
+
+
 class EnbPI:
     """Ensemble batch prediction intervals method
 
@@ -576,6 +590,14 @@ class EnbPI:
     :param int B: number of bootstrap models
     :param func agg_func_loo: aggregation function of LOO estimators.
     :param int random_state: determines random generation.
+    :param int n_jobs: number of jobs used to fit the bootstrap models and
+        to compute their predictions in parallel (see :class:`joblib.Parallel`).
+        Defaults to 1 (sequential).
+    :param dtype: floating point type of the bootstrap predictions, of the
+        OOB matrix and of the residuals queue updated online by
+        :meth:`predict`. The residuals computed in :meth:`fit` keep the type
+        of the training labels. `np.float32` halves the memory traffic of the
+        LOO aggregation at the cost of precision. Defaults to `np.float64`.
 
     .. NOTE::
 
@@ -638,14 +660,23 @@ class EnbPI:
     """
 
     def __init__(
-        self, predictor, B: int, agg_func_loo=np.mean, random_state=None
+        self,
+        predictor,
+        B: int,
+        agg_func_loo=np.mean,
+        random_state=None,
+        n_jobs: int = 1,
+        dtype=np.float64,
     ):
         self.predictor = predictor
         self.B = B
+        self.n_jobs = n_jobs
+        # Floating point type of the bootstrap predictions and residuals
+        self.dtype = dtype
         # Aggregation function of LOO predictions
         self.agg_func_loo = agg_func_loo
-        # Initialisation of residuals list
-        self.residuals = []
+        # Initialisation of residuals array
+        self.residuals = np.empty(0)
         # Boostrapped models list for estimations
         self._boot_predictors = None
         # Randome seed
@@ -655,6 +686,24 @@ class EnbPI:
         self._oob_dict = None
         self._boot_dict = None
         self._oob_matrix = None
+        self._oob_mean_row = None
+
+    def __setstate__(self, state: dict):
+        """Restore the EnbPI object from its pickled state. Objects pickled
+        before the `n_jobs` and `dtype` options were introduced get their
+        default values, their residuals list is converted to an array and
+        the mean row of their OOB matrix is computed.
+
+        :param dict state: pickled state.
+        """
+        self.n_jobs = 1
+        self.dtype = np.float64
+        self._oob_mean_row = None
+        self.__dict__.update(state)
+
+        self.residuals = np.asarray(self.residuals)
+        if self._oob_mean_row is None and self._oob_matrix is not None:
+            self._oob_mean_row = self._oob_matrix.mean(axis=0)
 
     def _compute_residuals(self, y_pred, y_true):
         """Residual computation formula.
@@ -668,18 +717,25 @@ class EnbPI:
         """
         return nonconformity_scores.mad(y_pred, y_true)
 
-    def _compute_pi(self, y_pred, w):
+    def _compute_pi(self, y_pred, w, out=None):
         """Compute prediction intervals.
 
         :param ndarray y_pred: predicted values.
         :param ndarray w: residuals' quantiles.
+        :param Tuple[ndarray] out: if provided, arrays in which the lower and
+            upper bounds are stored.
 
         :returns: prediction intervals.
         :rtype: Tuple[ndarray]
 
         """
+        if out is None:
+            return prediction_sets.constant_interval(y_pred, w)
 
-        return prediction_sets.constant_interval(y_pred, w)
+        y_lo, y_hi = out
+        np.subtract(y_pred, w, out=y_lo)
+        np.add(y_pred, w, out=y_hi)
+        return y_lo, y_hi
 
     def _compute_boot_residuals(self, boot_pred, y_true):
         """Compute residuals w.r.t the boostrap aggregation.
@@ -688,26 +744,121 @@ class EnbPI:
         :param ndarray y_true: true targets.
 
         :returns: residuals.
-        :rtype: list[ndarray]
+        :rtype: ndarray
 
         """
         # Approximation of LOO predictions:
         #   For each training sample X_i, the LOO estimate is built from
         #   averaging the predictions of bootstrap models whose OOB include X_i
-        loo_pred = (self._oob_matrix * boot_pred.T).sum(-1)
-        residuals = nonconformity_scores.mad(y_pred=loo_pred, y_true=y_true)
-        return list(residuals)
+        #   The row-wise dot products are computed without materializing the
+        #   (T, B) elementwise products
+        loo_pred = np.einsum("ij,ji->i", self._oob_matrix, boot_pred)
+        return nonconformity_scores.mad(y_pred=loo_pred, y_true=y_true)
 
-    def _compute_loo_predictions(self, boot_pred):
+    def _compute_loo_predictions(self, boot_pred, out=None):
         """Compute Leave-One-Out (LOO) predictions from bootstrapped predicitons.
 
         :param ndarray boot_pred: bootstrapped predicted values.
+        :param ndarray out: if provided, buffer in which the LOO predictions
+            are stored.
 
         :returns: LOO prediction.
         :rtype: ndarray
 
         """
-        return np.matmul(self._oob_matrix, boot_pred)
+        return np.matmul(self._oob_matrix, boot_pred, out=out)
+
+    def _aggregate_loo_predictions(self, boot_pred):
+        """Compute the ensemble predictions by aggregating the Leave-One-Out
+        (LOO) predictions from bootstrapped predictions.
+
+        The LOO predictions have T values per test sample. They are computed
+        and aggregated by blocks of test samples to bound the memory
+        footprint.
+
+        :param ndarray boot_pred: bootstrapped predicted values.
+
+        :returns: ensemble predictions.
+        :rtype: ndarray
+
+        """
+        # The mean of the LOO predictions is the product of the mean row of
+        # the OOB matrix with the bootstrapped predictions: the LOO
+        # predictions do not need to be computed
+        if self.agg_func_loo is np.mean:
+            return np.tensordot(self._oob_mean_row, boot_pred, axes=1)
+
+        # Single test sample whose axis has been squeezed
+        if boot_pred.ndim < 2:
+            loo_preds = self._compute_loo_predictions(boot_pred)
+            return self.agg_func_loo(loo_preds, axis=0)
+
+        n_test = boot_pred.shape[1]
+        sample_nbytes = (
+            boot_pred.itemsize
+            * len(self._oob_matrix)
+            * np.prod(boot_pred.shape[2:])
+        )
+        block_size = max(1, int(_LOO_BLOCK_NBYTES // sample_nbytes))
+
+        # Buffer of the LOO predictions shared by the blocks
+        loo_preds_buffer = None
+        if n_test > block_size:
+            loo_preds_buffer = np.empty(
+                (len(self._oob_matrix), block_size) + boot_pred.shape[2:],
+                dtype=np.result_type(self._oob_matrix, boot_pred),
+            )
+
+        y_pred_blocks = []
+        for start in range(0, max(n_test, 1), block_size):
+            boot_pred_block = boot_pred[:, start : start + block_size]
+            out = None
+            if loo_preds_buffer is not None:
+                out = loo_preds_buffer[:, : boot_pred_block.shape[1]]
+            # Approximation of LOO predictions
+            loo_preds = self._compute_loo_predictions(boot_pred_block, out=out)
+            y_pred_block = self.agg_func_loo(loo_preds, axis=0)
+            # The aggregation must not be a view of the reused buffer
+            if out is not None and np.may_share_memory(y_pred_block, out):
+                y_pred_block = np.copy(y_pred_block)
+            y_pred_blocks.append(y_pred_block)
+
+        if len(y_pred_blocks) == 1:
+            return y_pred_blocks[0]
+
+        return np.concatenate(y_pred_blocks)
+
+    def _batch_predict(self, X, out=None):
+        """Predict X with each bootstrap model. The predictions are computed
+        in parallel threads if :data:`n_jobs` != 1.
+
+        :param ndarray X: features.
+        :param ndarray out: if provided, buffer in which the predictions are
+            stored. Its first axis has to be of length B.
+
+        :returns: predictions of the bootstrap models, stacked along the
+            first axis.
+        :rtype: ndarray
+
+        """
+        # No need for a pool of workers if the predictions are sequential
+        if self.n_jobs == 1:
+            boot_preds = (
+                boot_predictor.predict(X)
+                for boot_predictor in self._boot_predictors
+            )
+        else:
+            boot_preds = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(boot_predictor.predict)(X)
+                for boot_predictor in self._boot_predictors
+            )
+
+        if out is None:
+            return np.array(list(boot_preds), dtype=self.dtype)
+
+        for b, boot_pred in enumerate(boot_preds):
+            out[b] = boot_pred
+        return out
 
     def fit(self, X, y, **kwargs):
         """Fit B bootstrap models on the bootstrap bags and respectively
@@ -723,7 +874,8 @@ class EnbPI:
         self._oob_dict = {}  # Key: b. Value: out of bag weighted index
         self._boot_predictors = []  # f^_b for b in [1,B]
         T = len(X)  # Number of samples to be considered during training
-        horizon_indices = np.arange(T)
+        # Membership of the training samples in the current bootstrap sample
+        in_bag_mask = np.empty(T, dtype=bool)
 
         # === (1) === Do bootstrap sampling, reference OOB samples===
         self._boot_dict = {}
@@ -735,73 +887,76 @@ class EnbPI:
             random_state_b = (
                 None if self.random_state is None else self.random_state + b
             )
+            # Random generator of the b-th bootstrap sample. It draws the same
+            # samples as sklearn.utils.resample with the same seed, and it is
+            # created once so that each retry draws a new sample.
+            rng_b = check_random_state(random_state_b)
 
             boot = None  # Initialization
             oob_units = None  # Initialization
 
             # Randomly sample bootstrap sets until the out-of-bag is not empty
             while oob_is_empty:
-                boot = resample(
-                    horizon_indices,
-                    replace=True,
-                    n_samples=T,
-                    random_state=random_state_b,
-                )
-
-                if boot is None:  # sanity check
-                    raise RuntimeError("Bootstrap dataset is empty.")
-
-                oob_units = np.setdiff1d(horizon_indices, boot)
+                boot = rng_b.randint(0, T, size=T)
+                in_bag_mask[:] = False
+                in_bag_mask[boot] = True
+                oob_units = np.flatnonzero(~in_bag_mask)
                 oob_is_empty = len(oob_units) == 0
             # OOB is not empty, proceed
             self._boot_dict[b] = boot
             self._oob_dict[b] = oob_units
 
-        # Create oob_matrix, rows for every i-th training sample
-        # and columns for each j-th bootstrap model.
-        # Cell value is > 0 if i-th sample is in the j-th OOB set
-        # and 0 otherwise.
-        self._oob_matrix = np.zeros((T, self.B))
-
-        for i in range(T):
-            oobs_for_i_th_unit = [
-                1 if i in self._oob_dict[b] else 0 for b in range(self.B)
-            ]
-
-            # Verify OOB-ness for all i-th training samples;
-            # raise an exception otherwise.
-            if np.sum(oobs_for_i_th_unit) == 0:
-                raise RuntimeError(
-                    f"Training sample {i} is included in all boostrap sets."
-                    + ' Increase "B", the number of boostrap models.'
-                )
-
-            self._oob_matrix[i] = oobs_for_i_th_unit
+        # Create the OOB membership matrix, rows for every i-th training
+        # sample and columns for each j-th bootstrap model.
+        # Cell value is True if i-th sample is in the j-th OOB set
+        # and False otherwise.
+        oob_membership = np.zeros((T, self.B), dtype=bool)
+
+        for b, oob_units in self._oob_dict.items():
+            oob_membership[oob_units, b] = True
+
+        # Verify OOB-ness for all i-th training samples;
+        # raise an exception otherwise.
+        oob_counts = np.count_nonzero(oob_membership, axis=1)[:, np.newaxis]
+        not_oob = np.flatnonzero(oob_counts == 0)
+        if len(not_oob) > 0:
+            raise RuntimeError(
+                f"Training sample {not_oob[0]} is included in all boostrap "
+                + 'sets. Increase "B", the number of boostrap models.'
+            )
 
         # oob matrix normalization: the sum of each rows is made equal to 1.
-        self._oob_matrix /= np.tile(
-            np.sum(self._oob_matrix, axis=1), (self.B, 1)
-        ).transpose()
+        # The floating point matrix is only allocated at this step.
+        self._oob_matrix = np.divide(
+            oob_membership, oob_counts, dtype=self.dtype
+        )
+        del oob_membership
+        self._oob_mean_row = self._oob_matrix.mean(axis=0)
 
         # === (2) === Fit predictors on bootstrapped samples
         # print(" === step 1/2: fitting bootstrap estimators ...")
 
-        for b in range(self.B):
-            # Retrieve list of indexes of previously bootstrapped sample
-            boot = self._boot_dict[b]
-            boot_predictor = self.predictor.copy()  # Instantiate model
-            boot_predictor.fit(X[boot], y[boot], **kwargs)  # fit predictor
-            self._boot_predictors.append(boot_predictor)  # Store fitted model
+        # The bootstrap models are independent from each other, they are
+        # fitted in parallel if n_jobs != 1. Each bootstrap model predicts X
+        # right after being fitted.
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_one)(
+                self.predictor, X, y, self._boot_dict[b], **kwargs
+            )
+            for b in range(self.B)
+        )
+        self._boot_predictors = [
+            boot_predictor for boot_predictor, _ in results
+        ]
 
         # === (3) === Residuals computation
         # print(" === step 2/2: computing nonconformity scores ...")
         # Predictions on X by each bootstrap estimator
-        boot_preds = [
-            self._boot_predictors[b].predict(X) for b in range(self.B)
-        ]
-        boot_preds = np.array(boot_preds)
+        boot_preds = np.array(
+            [boot_pred for _, boot_pred in results], dtype=self.dtype
+        )
         residuals = self._compute_boot_residuals(boot_preds, y)
-        self.residuals += residuals
+        self.residuals = np.concatenate((self.residuals, residuals))
 
     def predict(
         self, X_test, alpha=0.1, y_true=None, s=None
@@ -820,10 +975,12 @@ class EnbPI:
         :rtype: Tuple[ndarray]
 
         """
-        y_pred_upper_list = []
-        y_pred_lower_list = []
-        y_pred_list = []
-        updated_residuals = list(deepcopy(self.residuals))
+        # Predictions and PI bounds, allocated when the shapes of the
+        # outputs are known (first batch)
+        y_pred, y_pred_lower, y_pred_upper = None, None, None
+        # Residuals updated as a FIFO queue. The queue is never modified in
+        # place, so the stored residuals are only copied for a dtype change.
+        updated_residuals = np.asarray(self.residuals, dtype=self.dtype)
 
         # WARNING: following the paper of Xu et al 2021,
         # we should __NOT__ look for the (1-alpha)(1+1/N) empirical quantile, unlike with
@@ -838,7 +995,14 @@ class EnbPI:
         #
         # TODO: go back to EnbPI-v1 paper and double check what above.
         #
-        res_quantile = np.quantile(self.residuals, (1 - alpha), method="linear")
+        # The residuals sequence is kept sorted when it is updated online, so
+        # that its quantile is computed without sorting the whole sequence at
+        # each batch. Otherwise, a partial sort is enough.
+        if y_true is not None:
+            sorted_residuals = np.sort(updated_residuals)
+            res_quantile = _sorted_quantile(sorted_residuals, (1 - alpha))
+        else:
+            res_quantile = _partition_quantile(self.residuals, (1 - alpha))
 
         if y_true is None or (y_true is not None and s is None):
             n_batches = 1
@@ -851,6 +1015,15 @@ class EnbPI:
         if self._boot_predictors is None:  # Sanity check
             raise RuntimeError("Fatal error: _boot_predictors is None.")
 
+        # Bootstrap predictions do not depend on the residuals updates: if
+        # they fit in memory, each model predicts all the test samples after
+        # the first batch at once instead of paying the overhead of a call
+        # per batch. Otherwise, the batches share a buffer of the bootstrap
+        # predictions.
+        stacked_boot_preds = None
+        boot_preds_buffer = None
+        max_batch_len = len(X_test) - (n_batches - 1) * s
+
         # Inference is performed by batch
         for i in np.arange(n_batches):
             if i == n_batches - 1:
@@ -862,38 +1035,191 @@ class EnbPI:
                     y_true[i * s : (i + 1) * s] if y_true is not None else None
                 )
             # Matrix containing batch predictions of each bootstrap model
-            boot_preds = np.array(
-                [
-                    self._boot_predictors[b].predict(X_batch)
-                    for b in range(self.B)
+            if stacked_boot_preds is not None:
+                boot_preds = stacked_boot_preds[
+                    :, (i - 1) * s : (i - 1) * s + len(X_batch)
                 ]
-            )
-            # Approximation of LOO predictions
-            loo_preds = self._compute_loo_predictions(boot_preds)
+            elif boot_preds_buffer is None:
+                boot_preds = self._batch_predict(X_batch)
+                # The size of the stacked predictions is known from those of
+                # the first batch, whatever the shape of a prediction
+                stacked_nbytes = (
+                    (boot_preds.size // len(X_batch))
+                    * (len(X_test) - len(X_batch))
+                    * boot_preds.itemsize
+                )
+                if (
+                    i == 0
+                    and n_batches > 1
+                    and stacked_nbytes <= _STACKED_PREDICT_NBYTES
+                ):
+                    stacked_boot_preds = self._batch_predict(
+                        X_test[len(X_batch) :]
+                    )
+                # The predictions of a single sample may be squeezed: the
+                # buffer is only used when the shape of samples is known
+                elif n_batches > 1 and len(X_batch) > 1:
+                    boot_preds_buffer = np.empty(
+                        (self.B, max_batch_len) + boot_preds.shape[2:],
+                        dtype=boot_preds.dtype,
+                    )
+            else:
+                boot_preds = self._batch_predict(
+                    X_batch, out=boot_preds_buffer[:, : len(X_batch)]
+                )
             # Ensemble prediction based on the aggregation of LOO estimations
-            y_pred_batch = self.agg_func_loo(loo_preds, axis=0)
+            y_pred_batch = self._aggregate_loo_predictions(boot_preds)
             if y_pred_batch.shape == ():  # Case predicting a single outcome
                 y_pred_batch = y_pred_batch[np.newaxis, ...]
-            y_pred_batch_lower, y_pred_batch_upper = self._compute_pi(
-                y_pred_batch, res_quantile
-            )
-            # Update prediction / PI lists for the current batch
-            y_pred_upper_list += list(y_pred_batch_upper)
-            y_pred_lower_list += list(y_pred_batch_lower)
-            y_pred_list += list(y_pred_batch)
+            # Update prediction / PI arrays for the current batch. Once
+            # allocated, the PI bounds are directly written in these arrays.
+            start, stop = i * s, i * s + len(y_pred_batch)
+            if y_pred is None:
+                y_pred_batch_lower, y_pred_batch_upper = self._compute_pi(
+                    y_pred_batch, res_quantile
+                )
+                y_pred = _empty_like_batch(y_pred_batch, len(X_test))
+                y_pred_lower = _empty_like_batch(
+                    y_pred_batch_lower, len(X_test)
+                )
+                y_pred_upper = _empty_like_batch(
+                    y_pred_batch_upper, len(X_test)
+                )
+                y_pred_lower[start:stop] = y_pred_batch_lower
+                y_pred_upper[start:stop] = y_pred_batch_upper
+            else:
+                self._compute_pi(
+                    y_pred_batch,
+                    res_quantile,
+                    out=(y_pred_lower[start:stop], y_pred_upper[start:stop]),
+                )
+            y_pred[start:stop] = y_pred_batch
 
             # Update residuals
             if y_true is not None:
                 residuals = self._compute_residuals(y_pred_batch, y_true_batch)
-                updated_residuals = updated_residuals[s:]
-                updated_residuals += list(residuals)
-                res_quantile = np.quantile(updated_residuals, (1 - alpha))
-
-        return (
-            np.array(y_pred_list),
-            np.array(y_pred_lower_list),
-            np.array(y_pred_upper_list),
-        )
+                # Same type as the sorted residuals they are merged into
+                residuals = residuals.astype(self.dtype, copy=False)
+                sorted_residuals = _update_sorted(
+                    sorted_residuals, updated_residuals[:s], residuals
+                )
+                updated_residuals = np.concatenate(
+                    (updated_residuals[s:], residuals)
+                )
+                res_quantile = _sorted_quantile(sorted_residuals, (1 - alpha))
+
+        if y_pred is None:  # No batch to be processed
+            return np.array([]), np.array([]), np.array([])
+
+        return y_pred, y_pred_lower, y_pred_upper
+
+
+def _update_sorted(
+    sorted_a: np.ndarray, removed: Iterable, added: Iterable
+) -> np.ndarray:
+    """Remove and add values in a sorted array, keeping it sorted.
+
+    :param ndarray sorted_a: array sorted in ascending order.
+    :param Iterable removed: values to be removed. Each one of them has to be
+        in `sorted_a`.
+    :param Iterable added: values to be added.
+
+    :returns: updated sorted array.
+    :rtype: ndarray
+    """
+    removed = np.sort(removed)
+    # Positions of the removed values. Several equal values are removed from
+    # consecutive positions.
+    idxs = np.searchsorted(sorted_a, removed, side="left")
+    idxs += np.arange(len(removed)) - np.searchsorted(removed, removed)
+    sorted_a = np.delete(sorted_a, idxs)
+
+    added = np.sort(added)
+    return np.insert(sorted_a, np.searchsorted(sorted_a, added), added)
+
+
+def _sorted_quantile(sorted_a: np.ndarray, q: float) -> float:
+    """Compute the q-th quantile of an array sorted in ascending order. The
+    result is the same as :code:`np.quantile(sorted_a, q, method="linear")`
+    without sorting the array again.
+
+    :param ndarray sorted_a: array sorted in ascending order.
+    :param float q: quantile order, in the interval [0, 1].
+
+    :returns: q-th quantile.
+    :rtype: float
+    """
+    n = len(sorted_a)
+    # NaN values are sorted last and are propagated as in np.quantile
+    if np.isnan(sorted_a[-1]):
+        return np.nan
+
+    virtual_index = (n - 1) * q
+    if virtual_index >= n - 1:
+        return sorted_a[-1]
+
+    # Linear interpolation between the two closest order statistics,
+    # computed with the same floating point operations as np.quantile
+    previous_index = int(np.floor(virtual_index))
+    gamma = virtual_index - previous_index
+    lower, upper = sorted_a[previous_index], sorted_a[previous_index + 1]
+    diff = upper - lower
+    if gamma >= 0.5:
+        return upper - diff * (1 - gamma)
+    return lower + diff * gamma
+
+
+def _partition_quantile(a: Iterable, q: float) -> float:
+    """Compute the q-th quantile of an array by partial sorting. The result is
+    the same as :code:`np.quantile(a, q, method="linear")` in linear time.
+
+    :param Iterable a: input array.
+    :param float q: quantile order, in the interval [0, 1].
+
+    :returns: q-th quantile.
+    :rtype: float
+    """
+    a = np.asarray(a)
+    n = len(a)
+    previous_index = int(np.floor((n - 1) * q))
+    # Only the order statistics read by _sorted_quantile are put in place:
+    # the two closest to the quantile, and the last one where NaN are moved
+    kth = np.unique(
+        np.minimum([previous_index, previous_index + 1, n - 1], n - 1)
+    )
+    return _sorted_quantile(np.partition(a, kth), q)
+
+
+def _empty_like_batch(batch: np.ndarray, n: int) -> np.ndarray:
+    """Allocate an array to gather the outputs of all batches.
+
+    :param ndarray batch: output of one batch.
+    :param int n: total number of samples.
+
+    :returns: uninitialized array of length n whose samples have the same
+        shape and type as those of the batch.
+    :rtype: ndarray
+    """
+    batch = np.asarray(batch)
+    return np.empty((n,) + batch.shape[1:], dtype=batch.dtype)
+
+
+def _fit_one(predictor, X: Iterable, y: Iterable, boot: np.ndarray, **kwargs):
+    """Fit a copy of a predictor on a bootstrap sample and predict the whole
+    training feature set.
+
+    :param BasePredictor predictor: predictor to be copied and fitted.
+    :param ndarray X: training feature set.
+    :param ndarray y: training label set.
+    :param ndarray boot: indices of the bootstrap sample.
+    :param dict kwargs: fit arguments for the underlying model.
+
+    :returns: fitted predictor and its predictions on X.
+    :rtype: Tuple
+    """
+    boot_predictor = predictor.copy()  # Instantiate model
+    boot_predictor.fit(X[boot], y[boot], **kwargs)  # fit predictor
+    return boot_predictor, boot_predictor.predict(X)
 
 
 class AdaptiveEnbPI(EnbPI):
@@ -904,6 +1230,13 @@ class AdaptiveEnbPI(EnbPI):
     :param int B: number of bootstrap models
     :param func agg_func_loo: aggregation function of LOO estimators.
     :param int random_state: determines random generation.
+    :param int n_jobs: number of jobs used to fit the bootstrap models and
+        to compute their predictions in parallel (see :class:`joblib.Parallel`).
+        Defaults to 1 (sequential).
+    :param dtype: floating point type of the bootstrap predictions, of the
+        OOB matrix and of the residuals queue updated online by
+        :meth:`predict`. The residuals computed in :meth:`fit` keep the type
+        of the training labels. Defaults to `np.float64`.
 
     .. note::
 
@@ -966,18 +1299,27 @@ class AdaptiveEnbPI(EnbPI):
 
     """
 
-    def _compute_pi(self, y_pred, w) -> Tuple[np.ndarray]:
+    def _compute_pi(self, y_pred, w, out=None) -> Tuple[np.ndarray]:
         """Compute prediction intervals.
 
         :param ndarray y_pred: predicted values and variabilities.
         :param ndarray w: residuals' quantiles.
+        :param Tuple[ndarray] out: if provided, arrays in which the lower and
+            upper bounds are stored.
 
         :returns: prediction intervals.
         :rtype: Tuple[ndarray]
 
         """
+        if out is None:
+            return prediction_sets.scaled_interval(y_pred, w)
 
-        return prediction_sets.scaled_interval(y_pred, w)
+        # The scaled margin is computed once, in the upper bound buffer
+        y_lo, y_hi = out
+        np.multiply(w, y_pred[:, 1], out=y_hi)
+        np.subtract(y_pred[:, 0], y_hi, out=y_lo)
+        np.add(y_pred[:, 0], y_hi, out=y_hi)
+        return y_lo, y_hi
 
     def _compute_residuals(self, y_pred, y_true):
         """Residual computation formula.
@@ -993,21 +1335,45 @@ class AdaptiveEnbPI(EnbPI):
         return nonconformity_scores.scaled_mad(y_pred, y_true)
 
     def _compute_boot_residuals(self, boot_pred, y_true):
-        loo_pred = (self._oob_matrix * boot_pred[:, :, 0].T).sum(-1)
-        loo_sigma = (self._oob_matrix * boot_pred[:, :, 1].T).sum(-1)
-        y_pred = np.stack((loo_pred, loo_sigma), axis=-1)
-        residuals = self._compute_residuals(y_pred=y_pred, y_true=y_true)
-        return list(residuals)
+        """Compute residuals w.r.t the boostrap aggregation.
+
+        :param ndarray boot_pred: bootstrapped predicted values and
+            variabilities.
+        :param ndarray y_true: true targets.
+
+        :returns: residuals.
+        :rtype: ndarray
+
+        """
+        # LOO predictions of the mean and of the variability, computed in a
+        # single pass over the bootstrapped predictions
+        y_pred = np.einsum("ij,jik->ik", self._oob_matrix, boot_pred)
+        return self._compute_residuals(y_pred=y_pred, y_true=y_true)
 
-    def _compute_loo_predictions(self, boot_pred):
+    def _compute_loo_predictions(self, boot_pred, out=None):
         """Compute Leave-One-Out (LOO) predictions from bootstrapped predicitons.
 
         :param ndarray boot_pred: bootstrapped predicted values.
+        :param ndarray out: if provided, buffer in which the LOO predictions
+            are stored.
 
         :returns: LOO prediction.
         :rtype: ndarray
 
         """
-        loo_mean = np.matmul(self._oob_matrix, boot_pred[:, :, 0])
-        loo_sigma = np.matmul(self._oob_matrix, boot_pred[:, :, 1])
-        return np.stack((loo_mean, loo_sigma), axis=-1)
+        # The means and variabilities are multiplied at once: the trailing
+        # axes are flattened (without copy if boot_pred is contiguous) so that
+        # a single matrix product writes the stacked LOO predictions
+        T = len(self._oob_matrix)
+        flat_boot_pred = boot_pred.reshape(len(boot_pred), -1)
+        if out is None:
+            loo_preds = np.matmul(self._oob_matrix, flat_boot_pred)
+            return loo_preds.reshape((T,) + boot_pred.shape[1:])
+
+        # The buffer is written through a flattened view, which exists as
+        # long as the samples of the buffer are contiguous
+        flat_out = out.reshape(T, -1)
+        np.matmul(self._oob_matrix, flat_boot_pred, out=flat_out)
+        if not np.may_share_memory(flat_out, out):
+            out[...] = flat_out.reshape(out.shape)
+        return out
@@ -25,9 +25,13 @@ from typing import Callable
 import numpy as np
 import pytest
 
+from deel.puncc.api import calibration
 from deel.puncc.api import nonconformity_scores
 from deel.puncc.api import prediction_sets
+from deel.puncc.api.calibration import _cv_plus_bounds
 from deel.puncc.api.calibration import BaseCalibrator
+from deel.puncc.api.calibration import CvPlusCalibrator
+from deel.puncc.api.utils import quantile
 
 
 @pytest.mark.parametrize(
@@ -103,3 +107,140 @@ def test_classification_calibrator(rand_class_data, alpha, random_state):
     set_pred = calibrator.calibrate(y_pred=y_pred_test, alpha=alpha)
 
     assert set_pred is not None
+
+
+@pytest.mark.parametrize("q", [0.05, 0.5, 0.9, 0.99])
+def test_cv_plus_bounds(q):
+    rng = np.random.default_rng(42)
+    concat_y_lo = rng.normal(size=(10, 101))
+    concat_y_hi = rng.normal(size=(10, 101))
+
+    # Reference: quantiles of the aggregated bounds
+    expected_y_lo = -1 * quantile(-1 * concat_y_lo, q)
+    expected_y_hi = quantile(concat_y_hi, q)
+
+    y_lo, y_hi = _cv_plus_bounds(concat_y_lo, concat_y_hi, q)
+
+    np.testing.assert_array_equal(y_lo, expected_y_lo)
+    np.testing.assert_array_equal(y_hi, expected_y_hi)
+
+
+# With 100 calibration samples, blocks of 1, 7 and 30 test samples
+@pytest.mark.parametrize("block_nbytes", [1, 5600, 24000])
+def test_cv_plus_calibrator_blocks(rand_reg_data, monkeypatch, block_nbytes):
+    (y_pred_calib, y_calib, y_pred_test, _) = rand_reg_data
+
+    # K-fold calibrators fitted on disjoint subsets of the calibration data
+    kfold_calibrators = {}
+    kfold_predictions = {}
+    for k, fold in enumerate(np.array_split(np.arange(len(y_calib)), 4)):
+        kfold_calibrators[k] = BaseCalibrator(
+            nonconf_score_func=nonconformity_scores.mad,
+            pred_set_func=prediction_sets.constant_interval,
+        )
+        kfold_calibrators[k].fit(
+            y_pred=y_pred_calib[fold], y_true=y_calib[fold]
+        )
+        kfold_predictions[k] = y_pred_test + k
+    cvp_calibrator = CvPlusCalibrator(kfold_calibrators)
+    cvp_calibrator.fit()
+
+    # Reference: all the test samples in a single block
+    expected_y_lo, expected_y_hi = cvp_calibrator.calibrate(
+        alpha=0.1, kfold_predictions_dict=kfold_predictions
+    )
+
+    # Several blocks of test samples, the last one being shorter than the
+    # others for blocks of 7 and 30 samples
+    monkeypatch.setattr(calibration, "_CV_PLUS_BLOCK_NBYTES", block_nbytes)
+    y_lo, y_hi = cvp_calibrator.calibrate(
+        alpha=0.1, kfold_predictions_dict=kfold_predictions
+    )
+
+    np.testing.assert_array_equal(y_lo, expected_y_lo)
+    np.testing.assert_array_equal(y_hi, expected_y_hi)
+
+
+def test_calibrator_clone(rand_reg_data):
+    (y_pred_calib, y_calib, _, _) = rand_reg_data
+
+    calibrator = BaseCalibrator(
+        nonconf_score_func=nonconformity_scores.mad,
+        pred_set_func=prediction_sets.constant_interval,
+    )
+    calibrator.fit(y_pred=y_pred_calib, y_true=y_calib)
+
+    # The clone shares the strategy of the calibrator but is not fitted
+    clone = calibrator.clone()
+    assert clone is not calibrator
+    assert clone.nonconf_score_func is calibrator.nonconf_score_func
+    assert clone.pred_set_func is calibrator.pred_set_func
+    assert clone.get_nonconformity_scores() is None
+
+
+class _ShiftedCalibrator(BaseCalibrator):
+    def __init__(self, shift):
+        super().__init__(
+            nonconf_score_func=nonconformity_scores.mad,
+            pred_set_func=prediction_sets.constant_interval,
+        )
+        self.shift = shift
+
+
+def test_calibrator_subclass_clone(rand_reg_data):
+    (y_pred_calib, y_calib, _, _) = rand_reg_data
+
+    calibrator = _ShiftedCalibrator(shift=1.0)
+    calibrator.fit(y_pred=y_pred_calib, y_true=y_calib)
+
+    # Subclasses with their own constructor are cloned without their scores
+    clone = calibrator.clone()
+    assert isinstance(clone, _ShiftedCalibrator)
+    assert clone.shift == calibrator.shift
+    assert clone.get_nonconformity_scores() is None
+    assert calibrator.get_nonconformity_scores() is not None
+
+
+def test_weighted_quantile_cache(rand_reg_data):
+    (y_pred_calib, y_calib, y_pred_test, _) = rand_reg_data
+
+    calibrator = BaseCalibrator(
+        nonconf_score_func=nonconformity_scores.mad,
+        pred_set_func=prediction_sets.constant_interval,
+    )
+    calibrator.fit(y_pred=y_pred_calib, y_true=y_calib)
+    weights = np.random.default_rng(0).random(len(y_calib))
+    calibrator.set_norm_weights(BaseCalibrator.barber_weights(weights))
+    norm_weights = calibrator.get_norm_weights()
+
+    y_lo, y_hi = calibrator.calibrate(
+        y_pred=y_pred_test, alpha=0.1, weights=norm_weights
+    )
+    # The quantile is read from the cache on the second call
+    y_lo_c, y_hi_c = calibrator.calibrate(
+        y_pred=y_pred_test, alpha=0.1, weights=norm_weights
+    )
+    np.testing.assert_array_equal(y_lo, y_lo_c)
+    np.testing.assert_array_equal(y_hi, y_hi_c)
+
+    # Unweighted calls are not served by the weighted cache, before or after
+    # a weighted call
+    y_lo_u, _ = calibrator.calibrate(y_pred=y_pred_test, alpha=0.1)
+    residuals = np.concatenate(
+        (calibrator.get_nonconformity_scores(), [np.inf])
+    )
+    expected_q = quantile(residuals, 0.9)
+    np.testing.assert_allclose(y_lo_u, y_pred_test - expected_q)
+    calibrator.calibrate(y_pred=y_pred_test, alpha=0.1, weights=norm_weights)
+    y_lo_u2, _ = calibrator.calibrate(y_pred=y_pred_test, alpha=0.1)
+    np.testing.assert_array_equal(y_lo_u, y_lo_u2)
+
+    # New calibration weights invalidate the cache
+    calibrator.set_norm_weights(BaseCalibrator.barber_weights(weights**2))
+    y_lo_w, _ = calibrator.calibrate(
+        y_pred=y_pred_test,
+        alpha=0.1,
+        weights=calibrator.get_norm_weights(),
+    )
+    expected_q = quantile(residuals, 0.9, w=calibrator.get_norm_weights())
+    np.testing.assert_allclose(y_lo_w, y_pred_test - expected_q)
@@ -20,14 +20,19 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import copyreg
 import os
+import pickle
 import unittest
+from unittest import mock
 
 import numpy as np
+import pandas as pd
 from sklearn import linear_model
 from sklearn.datasets import make_regression
 from sklearn.model_selection import train_test_split
 
+from deel.puncc.api import conformalization
 from deel.puncc.api import nonconformity_scores
 from deel.puncc.api import prediction_sets
 from deel.puncc.api.calibration import BaseCalibrator
@@ -103,6 +108,22 @@ class ConformalPredictorCheck(unittest.TestCase):
                 self.X_test, alpha=0.1
             )
 
+        # Get nonconformity scores and weights without fitting
+        with self.assertRaises(RuntimeError):
+            conformal_predictor.get_nonconformity_scores()
+        with self.assertRaises(RuntimeError):
+            conformal_predictor.get_weights()
+
+        # Unknown aggregation method
+        conformal_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+            method="v",
+        )
+        with self.assertRaises(NotImplementedError):
+            conformal_predictor.fit(self.X_train, self.y_train)
+
     def test_pretrained_predictor(self):
         # Predictor initialized with trained model
         model = linear_model.LinearRegression()
@@ -165,6 +186,18 @@ class ConformalPredictorCheck(unittest.TestCase):
         self.assertIs(type(nconf_scores), dict)
         self.assertEqual(len(nconf_scores), 20)
 
+        # Concatenated nconf scores
+        (
+            nconf_scores_matrix,
+            fold_offsets,
+        ) = conformal_predictor._cv_cp_agg.get_residuals_matrix()
+        self.assertEqual(len(fold_offsets), 21)
+        for i, kth_nconf_scores in enumerate(nconf_scores.values()):
+            np.testing.assert_array_equal(
+                nconf_scores_matrix[fold_offsets[i] : fold_offsets[i + 1]],
+                kth_nconf_scores,
+            )
+
     def test_save_load(self):
         # Conformal predictor
         conformal_predictor = ConformalPredictor(
@@ -195,3 +228,251 @@ class ConformalPredictorCheck(unittest.TestCase):
         np.testing.assert_array_equal(y_pred_hi, l_y_pred_hi)
 
         os.remove("my_cp.pkl")
+
+    def _old_cv_cp_agg(self, conformal_predictor):
+        # Reproduce the pickle of the former format of the aggregator: it was
+        # pickled as a plain dictionary, K-fold predictors and calibrators
+        # being stored in dictionaries
+        cv_cp_agg = conformal_predictor._cv_cp_agg
+        old_calibrators = {}
+        for k, calibrator in enumerate(cv_cp_agg._calibrators):
+            old_state = {
+                key: value
+                for key, value in calibrator.__dict__.items()
+                if key not in ("_sorted_lemma_residuals", "_quantile_cache")
+            }
+            old_calibrators[k] = _OldPickle(BaseCalibrator, old_state)
+        return _OldPickle(
+            type(cv_cp_agg),
+            {
+                "K": cv_cp_agg.K,
+                "_predictors": dict(enumerate(cv_cp_agg._predictors)),
+                "_calibrators": old_calibrators,
+                "method": cv_cp_agg.method,
+            },
+        )
+
+    def test_load_baseline_format(self):
+        # Conformal predictor
+        conformal_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+
+        # Former format of `save`: the attributes of the conformal predictor
+        # are pickled as a dictionary
+        saved_dict = {
+            "calibrator": self.calibrator,
+            "predictor": self.predictor,
+            "splitter": self.kfold_splitter,
+            "method": "cv+",
+            "train": True,
+            "_cv_cp_agg": self._old_cv_cp_agg(conformal_predictor),
+        }
+        with open("my_old_cp.pkl", "wb") as output_file:
+            pickle.dump(saved_dict, output_file)
+
+        loaded_conformal_predictor = ConformalPredictor.load("my_old_cp.pkl")
+        os.remove("my_old_cp.pkl")
+
+        _, y_pred_lo, y_pred_hi = conformal_predictor.predict(
+            self.X_test, alpha=0.1
+        )
+        _, l_y_pred_lo, l_y_pred_hi = loaded_conformal_predictor.predict(
+            self.X_test, alpha=0.1
+        )
+        np.testing.assert_array_equal(y_pred_lo, l_y_pred_lo)
+        np.testing.assert_array_equal(y_pred_hi, l_y_pred_hi)
+
+    def test_unpickle_baseline_format(self):
+        # Conformal predictor
+        conformal_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+
+        # Former pickle of the conformal predictor instance itself, e.g.
+        # as an attribute of a SplitCP or CVPlus object
+        old_conformal_predictor = _OldPickle(
+            ConformalPredictor,
+            {
+                "calibrator": self.calibrator,
+                "predictor": self.predictor,
+                "splitter": self.kfold_splitter,
+                "method": "cv+",
+                "train": True,
+                "_cv_cp_agg": self._old_cv_cp_agg(conformal_predictor),
+            },
+        )
+        loaded_conformal_predictor = pickle.loads(
+            pickle.dumps(old_conformal_predictor)
+        )
+        self.assertIsInstance(loaded_conformal_predictor, ConformalPredictor)
+        self.assertEqual(loaded_conformal_predictor.n_jobs, 1)
+
+        _, y_pred_lo, y_pred_hi = conformal_predictor.predict(
+            self.X_test, alpha=0.1
+        )
+        _, l_y_pred_lo, l_y_pred_hi = loaded_conformal_predictor.predict(
+            self.X_test, alpha=0.1
+        )
+        np.testing.assert_array_equal(y_pred_lo, l_y_pred_lo)
+        np.testing.assert_array_equal(y_pred_hi, l_y_pred_hi)
+
+    def test_parallel_kfold_fit(self):
+        # Conformal predictors fitted sequentially and in parallel
+        predictions = []
+        for n_jobs in (1, 2):
+            conformal_predictor = ConformalPredictor(
+                predictor=self.predictor,
+                calibrator=self.calibrator,
+                splitter=self.kfold_splitter,
+                n_jobs=n_jobs,
+            )
+            conformal_predictor.fit(self.X_train, self.y_train)
+            predictions.append(
+                conformal_predictor.predict(self.X_test, alpha=0.1)
+            )
+
+        (_, y_lo, y_hi), (_, p_y_lo, p_y_hi) = predictions
+        np.testing.assert_array_equal(y_lo, p_y_lo)
+        np.testing.assert_array_equal(y_hi, p_y_hi)
+
+    def test_cached_kfold_predictions(self):
+        conformal_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+
+        # Consecutive calls on the same data for different alphas
+        X_test = np.copy(self.X_test)
+        _, y_lo_1, y_hi_1 = conformal_predictor.predict(X_test, alpha=0.1)
+        _, y_lo_2, y_hi_2 = conformal_predictor.predict(X_test, alpha=0.2)
+        self.assertTrue(np.all(y_lo_2 >= y_lo_1))
+        self.assertTrue(np.all(y_hi_2 <= y_hi_1))
+
+        # In-place modification of the data invalidates the cached predictions
+        X_test += 1
+        _, y_lo_3, y_hi_3 = conformal_predictor.predict(X_test, alpha=0.1)
+        fresh_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        fresh_predictor.fit(self.X_train, self.y_train)
+        _, y_lo_4, y_hi_4 = fresh_predictor.predict(X_test, alpha=0.1)
+        np.testing.assert_array_equal(y_lo_3, y_lo_4)
+        np.testing.assert_array_equal(y_hi_3, y_hi_4)
+
+    def test_predict_cache_hit_and_miss(self):
+        class CountingPredictor(BasePredictor):
+            n_calls = 0
+
+            def predict(self, X, **kwargs):
+                CountingPredictor.n_calls += 1
+                return super().predict(X, **kwargs)
+
+        conformal_predictor = ConformalPredictor(
+            predictor=CountingPredictor(linear_model.LinearRegression()),
+            calibrator=self.calibrator,
+            splitter=self.random_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+        expected = conformal_predictor.predict(self.X_test, alpha=0.1)
+
+        # Cache hit: the predictor is not called again
+        n_calls = CountingPredictor.n_calls
+        outputs = conformal_predictor.predict(self.X_test, alpha=0.1)
+        self.assertEqual(CountingPredictor.n_calls, n_calls)
+        for output, expected_output in zip(outputs, expected):
+            np.testing.assert_array_equal(output, expected_output)
+
+        # Cache miss on a mutated copy of the data
+        X_test = np.copy(self.X_test)
+        X_test[0] += 1
+        y_pred, _, _ = conformal_predictor.predict(X_test, alpha=0.1)
+        self.assertEqual(CountingPredictor.n_calls, n_calls + 1)
+        self.assertNotEqual(y_pred[0], expected[0][0])
+        np.testing.assert_array_equal(y_pred[1:], expected[0][1:])
+
+        # Features above the size limit are not hashed nor cached
+        with mock.patch.object(conformalization, "_PREDICT_CACHE_NBYTES", 0):
+            outputs = conformal_predictor.predict(self.X_test, alpha=0.1)
+        self.assertEqual(CountingPredictor.n_calls, n_calls + 2)
+        for output, expected_output in zip(outputs, expected):
+            np.testing.assert_array_equal(output, expected_output)
+
+    def test_copy_cached_predictions_only(self):
+        class RecordingPredictor(BasePredictor):
+            y_pred = None
+
+            def predict(self, X, **kwargs):
+                RecordingPredictor.y_pred = super().predict(X, **kwargs)
+                return RecordingPredictor.y_pred
+
+        conformal_predictor = ConformalPredictor(
+            predictor=RecordingPredictor(linear_model.LinearRegression()),
+            calibrator=self.calibrator,
+            splitter=self.random_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+
+        # Cached predictions are copied before being returned
+        y_pred, _, _ = conformal_predictor.predict(self.X_test, alpha=0.1)
+        self.assertIsNot(y_pred, RecordingPredictor.y_pred)
+        np.testing.assert_array_equal(y_pred, RecordingPredictor.y_pred)
+
+        # Predictions on data that cannot be cached are returned as is
+        X_test = pd.DataFrame(self.X_test)
+        y_pred, _, _ = conformal_predictor.predict(X_test, alpha=0.1)
+        self.assertIs(y_pred, RecordingPredictor.y_pred)
+
+    def test_fit_predict_predictor(self):
+        class FitPredictPredictor(BasePredictor):
+            n_calls = 0
+
+            def fit_predict(self, X_fit, y_fit, X_calib, **kwargs):
+                FitPredictPredictor.n_calls += 1
+                self.fit(X_fit, y_fit, **kwargs)
+                return self.predict(X_calib)
+
+        conformal_predictor = ConformalPredictor(
+            predictor=FitPredictPredictor(linear_model.LinearRegression()),
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        conformal_predictor.fit(self.X_train, self.y_train)
+        self.assertEqual(FitPredictPredictor.n_calls, 20)
+
+        # Same results as separate fit and predict calls
+        reference_predictor = ConformalPredictor(
+            predictor=self.predictor,
+            calibrator=self.calibrator,
+            splitter=self.kfold_splitter,
+        )
+        reference_predictor.fit(self.X_train, self.y_train)
+        _, y_lo, y_hi = conformal_predictor.predict(self.X_test, alpha=0.1)
+        _, ref_y_lo, ref_y_hi = reference_predictor.predict(
+            self.X_test, alpha=0.1
+        )
+        np.testing.assert_array_equal(y_lo, ref_y_lo)
+        np.testing.assert_array_equal(y_hi, ref_y_hi)
+
+
+class _OldPickle:
+    """Pickled as an instance of `cls` whose state is the dictionary `state`,
+    as instances without slots are.
+    """
+
+    def __init__(self, cls, state):
+        self.cls = cls
+        self.state = state
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (self.cls, object, None), self.state)
@@ -112,3 +112,60 @@ class SplitterCheck(unittest.TestCase):
         random_splits_tf = random_splitter(self.X_tf, self.y_tf)
         self.assertEqual(len(random_splits_tf), 1)
         self.assertEqual(len(random_splits_tf[0]), 4)
+
+    def test_kfoldsplitter_partition(self):
+        X = np.arange(100)[:, np.newaxis]
+        y = np.arange(100)
+        kfold_splitter = KFoldSplitter(K=10, random_state=0)
+
+        # Calibration subsets partition the samples
+        kfold_splits = kfold_splitter(X, y)
+        y_calibs = [y_calib for (_, _, _, y_calib) in kfold_splits]
+        np.testing.assert_array_equal(np.sort(np.concatenate(y_calibs)), y)
+
+        # Fit and calibration subsets of a fold are disjoint and complete
+        for X_fit, y_fit, X_calib, y_calib in kfold_splits:
+            self.assertEqual(len(np.intersect1d(y_fit, y_calib)), 0)
+            self.assertEqual(len(y_fit) + len(y_calib), len(y))
+            np.testing.assert_array_equal(X_fit[:, 0], y_fit)
+            np.testing.assert_array_equal(X_calib[:, 0], y_calib)
+
+    def test_kfoldsplitter_slice(self):
+        X = np.arange(100)[:, np.newaxis]
+        y = np.arange(100)
+        kfold_splitter = KFoldSplitter(K=10, random_state=0)
+        kfold_splits = kfold_splitter(X, y)
+
+        # Slices of the splits behave as slices of the list of splits
+        for index in (slice(3), slice(2, 5), slice(None, None, -2)):
+            sliced_splits = kfold_splits[index]
+            expected_splits = list(kfold_splits)[index]
+            self.assertEqual(len(sliced_splits), len(expected_splits))
+            for split, expected_split in zip(sliced_splits, expected_splits):
+                for data, expected_data in zip(split, expected_split):
+                    np.testing.assert_array_equal(data, expected_data)
+
+    def test_randomsplitter_selection(self):
+        # Dataframe and series with a non default index
+        index = np.random.permutation(100) + 1000
+        X = pd.DataFrame(np.random.randn(100, 3), index=index)
+        y = pd.Series(np.random.randn(100), index=index)
+        random_splitter = RandomSplitter(ratio=0.3, random_state=0)
+        ((X_fit, y_fit, X_calib, y_calib),) = random_splitter(X, y)
+
+        # Reference: selection of the rows by the random boolean mask
+        rng = np.random.RandomState(seed=0)
+        fit_mask = rng.rand(len(X)) > 0.3
+        pd.testing.assert_frame_equal(X_fit, X[fit_mask])
+        pd.testing.assert_series_equal(y_fit, y[fit_mask])
+        pd.testing.assert_frame_equal(X_calib, X[~fit_mask])
+        pd.testing.assert_series_equal(y_calib, y[~fit_mask])
+
+        # Same selection for ndarrays
+        ((X_fit, y_fit, X_calib, y_calib),) = random_splitter(
+            X.to_numpy(), y.to_numpy()
+        )
+        np.testing.assert_array_equal(X_fit, X.to_numpy()[fit_mask])
+        np.testing.assert_array_equal(y_fit, y.to_numpy()[fit_mask])
+        np.testing.assert_array_equal(X_calib, X.to_numpy()[~fit_mask])
+        np.testing.assert_array_equal(y_calib, y.to_numpy()[~fit_mask])
@@ -29,6 +29,7 @@ import tensorflow as tf
 from deel.puncc.api.utils import alpha_calib_check
 from deel.puncc.api.utils import features_len_check
 from deel.puncc.api.utils import quantile
+from deel.puncc.api.utils import quantiles
 from deel.puncc.api.utils import sample_len_check
 from deel.puncc.api.utils import supported_types_check
 
@@ -194,3 +195,33 @@ class QuantileCheck(unittest.TestCase):
         np.testing.assert_array_equal(
             expected_result, quantile(a=self.a_tensor, q=0.5, w=weights)
         )
+
+    def test_quantiles(self):
+        a = np.random.random_sample(size=101)
+        w = np.random.random_sample(size=101)
+        w /= np.sum(w)
+        qs = [0.05, 0.5, 0.9, 0.99]
+
+        np.testing.assert_array_equal(
+            [quantile(a=a, q=q) for q in qs], quantiles(a=a, q=qs)
+        )
+        np.testing.assert_array_equal(
+            [quantile(a=a, q=q, w=w) for q in qs], quantiles(a=a, q=qs, w=w)
+        )
+
+        with self.assertRaises(ValueError):
+            quantiles(a=a, q=[0.5, 1])
+
+    def test_unweighted_quantile_sweep(self):
+        # The partial sort selects the same order statistic as np.quantile
+        for n in (1, 2, 7, 100, 101):
+            a = np.random.random_sample(size=(3, n))
+            for q in np.linspace(0.01, 0.99, 50):
+                np.testing.assert_array_equal(
+                    np.quantile(a, q, axis=-1, method="inverted_cdf"),
+                    quantile(a=a, q=q),
+                )
+                self.assertEqual(
+                    np.quantile(a[0], q, method="inverted_cdf"),
+                    quantile(a=a[0], q=q),
+                )
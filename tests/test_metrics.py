@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+
+from deel.puncc import metrics
+
+
+@pytest.fixture
+def interval_grid():
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(size=50)
+    y_pred_lower = rng.normal(loc=-1, size=(4, 50))
+    y_pred_upper = rng.normal(loc=1, size=(4, 50))
+    alphas = np.array([0.05, 0.1, 0.2, 0.3])
+    return y_true, y_pred_lower, y_pred_upper, alphas
+
+
+def test_regression_grid_metrics(interval_grid):
+    y_true, y_pred_lower, y_pred_upper, alphas = interval_grid
+
+    cov = metrics.regression_mean_coverage_grid(
+        y_true, y_pred_lower, y_pred_upper
+    )
+    ace = metrics.regression_ace_grid(
+        y_true, y_pred_lower, y_pred_upper, alphas
+    )
+    width = metrics.regression_sharpness_grid(y_pred_lower, y_pred_upper)
+
+    for i, alpha in enumerate(alphas):
+        assert cov[i] == metrics.regression_mean_coverage(
+            y_true, y_pred_lower[i], y_pred_upper[i]
+        )
+        assert ace[i] == metrics.regression_ace(
+            y_true, y_pred_lower[i], y_pred_upper[i], alpha
+        )
+        assert width[i] == pytest.approx(
+            metrics.regression_sharpness(y_pred_lower[i], y_pred_upper[i])
+        )
+
+
+def test_regression_grid_metrics_broadcast(interval_grid):
+    y_true, y_pred_lower, y_pred_upper, alphas = interval_grid
+    # Single lower bound shared by a grid of upper bounds
+    lower = y_pred_lower[0]
+
+    cov = metrics.regression_mean_coverage_grid(y_true, lower, y_pred_upper)
+    ace = metrics.regression_ace_grid(y_true, lower, y_pred_upper, alphas)
+    width = metrics.regression_sharpness_grid(lower, y_pred_upper)
+
+    assert cov.shape == ace.shape == width.shape == (len(alphas),)
+    for i, alpha in enumerate(alphas):
+        assert cov[i] == metrics.regression_mean_coverage(
+            y_true, lower, y_pred_upper[i]
+        )
+        assert ace[i] == metrics.regression_ace(
+            y_true, lower, y_pred_upper[i], alpha
+        )
+        assert width[i] == pytest.approx(
+            metrics.regression_sharpness(lower, y_pred_upper[i])
+        )
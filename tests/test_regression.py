@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pickle
+
+import numpy as np
+import pytest
+from sklearn import linear_model
+
+from deel.puncc import regression
+from deel.puncc.api.prediction import BasePredictor
+from deel.puncc.api.prediction import MeanVarPredictor
+from deel.puncc.regression import _partition_quantile
+from deel.puncc.regression import _sorted_quantile
+from deel.puncc.regression import _update_sorted
+from deel.puncc.regression import AdaptiveEnbPI
+from deel.puncc.regression import EnbPI
+
+
+@pytest.mark.parametrize("n", [1, 2, 10, 101])
+def test_update_sorted(n):
+    rng = np.random.default_rng(n)
+    # Few distinct values, so that removed and added values have duplicates
+    a = rng.integers(0, 5, size=n).astype(float)
+    added = rng.integers(0, 5, size=n // 2 + 1).astype(float)
+    removed = a[: n // 2]
+
+    updated = _update_sorted(np.sort(a), removed, added)
+
+    expected = np.sort(np.concatenate((a[n // 2 :], added)))
+    np.testing.assert_array_equal(updated, expected)
+
+
+@pytest.mark.parametrize("q", [0.0, 0.1, 0.5, 0.9, 0.95, 1.0])
+def test_sorted_and_partition_quantiles(q):
+    rng = np.random.default_rng(0)
+    for n in (1, 2, 7, 100):
+        for a in (
+            rng.random(n),
+            rng.integers(0, 3, size=n).astype(float),
+            np.append(rng.random(n), np.nan),
+        ):
+            expected = np.quantile(a, q, method="linear")
+            np.testing.assert_equal(_sorted_quantile(np.sort(a), q), expected)
+            np.testing.assert_equal(_partition_quantile(a, q), expected)
+
+
+def _enbpi_online_reference(enbpi, X_test, y_test, alpha, s):
+    """Online EnbPI procedure computed from the predictions of all the test
+    samples at once, with a residuals FIFO queue kept in a list.
+    """
+    y_pred, _, _ = enbpi.predict(X_test, alpha=alpha)
+    residuals = list(enbpi.residuals)
+    y_lo, y_hi = np.empty_like(y_pred), np.empty_like(y_pred)
+    n_batches = len(y_test) // s
+    for i in range(n_batches):
+        stop = (i + 1) * s if i < n_batches - 1 else len(y_test)
+        batch = slice(i * s, stop)
+        res_quantile = np.quantile(residuals, 1 - alpha, method="linear")
+        y_lo[batch] = y_pred[batch] - res_quantile
+        y_hi[batch] = y_pred[batch] + res_quantile
+        residuals = residuals[s:] + list(np.abs(y_pred[batch] - y_test[batch]))
+    return y_pred, y_lo, y_hi
+
+
+@pytest.mark.parametrize("agg_func_loo", [np.mean, np.median])
+@pytest.mark.parametrize("stacked_predict_nbytes", [0, 2**26])
+def test_enbpi_online_update(
+    diabetes_data, monkeypatch, agg_func_loo, stacked_predict_nbytes
+):
+    (X_train, X_test, y_train, y_test) = diabetes_data
+    # Bootstrap predictions of all the test samples are either computed at
+    # once or by batch in a shared buffer. Small LOO blocks make the median
+    # aggregation reuse its buffer.
+    monkeypatch.setattr(
+        regression, "_STACKED_PREDICT_NBYTES", stacked_predict_nbytes
+    )
+    monkeypatch.setattr(regression, "_LOO_BLOCK_NBYTES", 2**15)
+
+    predictor = BasePredictor(linear_model.LinearRegression())
+    enbpi = EnbPI(predictor, B=30, agg_func_loo=agg_func_loo, random_state=0)
+    enbpi.fit(X_train, y_train)
+
+    # 100 test samples by batches of 12: the last batch has 16 samples
+    s = 12
+    y_pred, y_lo, y_hi = enbpi.predict(X_test, alpha=0.1, y_true=y_test, s=s)
+    e_y_pred, e_y_lo, e_y_hi = _enbpi_online_reference(
+        enbpi, X_test, y_test, alpha=0.1, s=s
+    )
+
+    np.testing.assert_allclose(y_pred, e_y_pred)
+    np.testing.assert_allclose(y_lo, e_y_lo)
+    np.testing.assert_allclose(y_hi, e_y_hi)
+
+
+def test_enbpi_parallel(diabetes_data):
+    (X_train, X_test, y_train, y_test) = diabetes_data
+
+    # EnbPI fitted and predicting sequentially and in parallel
+    outputs = []
+    for n_jobs in (1, 2):
+        predictor = BasePredictor(linear_model.LinearRegression())
+        enbpi = EnbPI(predictor, B=30, random_state=0, n_jobs=n_jobs)
+        enbpi.fit(X_train, y_train)
+        outputs.append(enbpi.predict(X_test, alpha=0.1, y_true=y_test, s=20))
+
+    for output, p_output in zip(*outputs):
+        np.testing.assert_array_equal(output, p_output)
+
+
+def test_enbpi_dtype(diabetes_data):
+    (X_train, X_test, y_train, y_test) = diabetes_data
+
+    outputs = []
+    for dtype in (np.float64, np.float32):
+        predictor = BasePredictor(linear_model.LinearRegression())
+        enbpi = EnbPI(predictor, B=30, random_state=0, dtype=dtype)
+        enbpi.fit(X_train, y_train)
+        outputs.append(enbpi.predict(X_test, alpha=0.1, y_true=y_test, s=20))
+
+    for output, output_32 in zip(*outputs):
+        assert output.dtype == np.float64
+        assert output_32.dtype == np.float32
+        np.testing.assert_allclose(output_32, output, rtol=1e-4)
+
+
+def test_enbpi_unpickle_former_format(diabetes_data):
+    (X_train, X_test, y_train, y_test) = diabetes_data
+
+    predictor = BasePredictor(linear_model.LinearRegression())
+    enbpi = EnbPI(predictor, B=30, random_state=0)
+    enbpi.fit(X_train, y_train)
+    expected = enbpi.predict(X_test, alpha=0.1, y_true=y_test, s=20)
+
+    # Former state: no n_jobs, dtype nor OOB mean row, residuals as a list
+    old_enbpi = EnbPI.__new__(EnbPI)
+    old_enbpi.__dict__.update(
+        {
+            key: value
+            for key, value in enbpi.__dict__.items()
+            if key not in ("n_jobs", "dtype", "_oob_mean_row")
+        }
+    )
+    old_enbpi.residuals = list(enbpi.residuals)
+
+    loaded_enbpi = pickle.loads(pickle.dumps(old_enbpi))
+    assert loaded_enbpi.n_jobs == 1
+    assert loaded_enbpi.dtype == np.float64
+    assert isinstance(loaded_enbpi.residuals, np.ndarray)
+    outputs = loaded_enbpi.predict(X_test, alpha=0.1, y_true=y_test, s=20)
+    for output, expected_output in zip(outputs, expected):
+        np.testing.assert_allclose(output, expected_output)
+
+
+def test_adaptive_enbpi_stacked_size(diabetes_data, monkeypatch):
+    (X_train, X_test, y_train, y_test) = diabetes_data
+
+    predictor = MeanVarPredictor(
+        [linear_model.LinearRegression(), linear_model.LinearRegression()]
+    )
+    aenbpi = AdaptiveEnbPI(predictor, B=30, random_state=0)
+    aenbpi.fit(X_train, y_train)
+    n_calls = []
+    batch_predict = aenbpi._batch_predict
+
+    def counting_batch_predict(X, out=None):
+        n_calls[-1] += 1
+        return batch_predict(X, out=out)
+
+    monkeypatch.setattr(aenbpi, "_batch_predict", counting_batch_predict)
+
+    # The 80 test samples after the first batch have a mean and a dispersion
+    # prediction per bootstrap model
+    stacked_nbytes = 30 * 80 * 2 * 8
+    outputs = []
+    for nbytes in (stacked_nbytes, stacked_nbytes - 1):
+        monkeypatch.setattr(regression, "_STACKED_PREDICT_NBYTES", nbytes)
+        n_calls.append(0)
+        outputs.append(aenbpi.predict(X_test, alpha=0.1, y_true=y_test, s=20))
+
+    # Stacked predictions of the batches after the first one, otherwise
+    # predictions batch by batch
+    assert n_calls == [2, 5]
+    for output, b_output in zip(*outputs):
+        np.testing.assert_allclose(output, b_output)